@@ -5,12 +5,13 @@
 
 import sys
 import os
-import time
+import re
+import threading
 import argparse
 import logging
+from logging.handlers import RotatingFileHandler
 import numpy as np
 from datetime import datetime, timedelta
-import MetaTrader5 as mt5
 import pandas as pd
 from typing import Tuple, Optional, List, Dict
 
@@ -33,10 +34,62 @@ except ImportError as e:
     print("   - Все модули в src/core/ должны быть доступны")
     sys.exit(1)
 
+# Ответы, подтверждающие действие в интерактивных запросах
+_YES_ANSWERS = frozenset(('y', 'yes', 'да'))
+
+# Сигналы стратегий, по которым открывается позиция, и их значки в логе
+_TRADE_SIGNALS = {'BUY': "📈", 'SELL': "📉"}
+
+# Меню после завершения обучения, собранное один раз
+_TRAINING_MENU = "\n".join([
+    "\n" + "=" * 50,
+    "🎓 ОБУЧЕНИЕ ЗАВЕРШЕНО",
+    "=" * 50,
+    "1 - 🧪 Начать тестовую торговлю",
+    "2 - 🎯 Начать реальную торговлю",
+    "3 - 🔍 Проанализировать рынок",
+    "4 - 🔙 Вернуться в главное меню",
+    "=" * 50,
+])
+
+# Разделитель отчета анализа рынка
+_BANNER = "=" * 70
+
+# Общий форматтер для логов тестовой торговли
+_TEST_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
 
 class AITrader:
     """Основной класс AI Trader"""
 
+    # Символы, содержащие код основной валюты, считаются валютными парами
+    _FOREX_RE = re.compile(r'(?:USD|EUR|GBP|JPY|AUD|CAD|CHF|NZD)')
+
+    # Пороги осцилляторов: название -> (колонки, значение по умолчанию, нижний порог, верхний порог).
+    # Сигнал OVERSOLD/OVERBOUGHT выдается, только если все колонки за порогом.
+    _OSCILLATOR_THRESHOLDS = {
+        'rsi': (('rsi',), 50, 30, 70),
+        'stochastic': (('stoch_k', 'stoch_d'), 50, 20, 80),
+    }
+
+    # Пункты меню выбора таймфрейма: номер -> (таймфрейм, описание)
+    _TIMEFRAMES = {
+        '1': ('M1', '1 минута'),
+        '2': ('M5', '5 минут'),
+        '3': ('M15', '15 минут'),
+        '4': ('M30', '30 минут'),
+        '5': ('H1', '1 час'),
+        '6': ('H4', '4 часа'),
+        '7': ('D1', '1 день'),
+        '8': ('W1', '1 неделя'),
+        '9': ('MN1', '1 месяц')
+    }
+    _TIMEFRAME_MENU = "\n".join(
+        ["\n⏰ ДОСТУПНЫЕ ТАЙМФРЕЙМЫ:", "=" * 40]
+        + [f"  {key}. {tf} - {desc}" for key, (tf, desc) in _TIMEFRAMES.items()]
+        + ["=" * 40]
+    )
+
     def __init__(self):
         self.logger = setup_logger('AITrader')
         self.settings = Settings()
@@ -49,6 +102,9 @@ class AITrader:
         self.current_strategy = None
         self.available_strategies = get_available_strategies()
         self.monitoring_symbols = []  # НОВЫЙ АТРИБУТ
+        self._training_cache = {}  # (symbol, timeframe) -> (ключ баров, данные с индикаторами)
+        self._symbol_info_cache = {}  # symbol -> спецификация символа (объемы, точность)
+        self._symbol_partition = None  # (список символов, валютные пары, остальные, множество имен)
 
     def check_market_availability(self) -> Tuple[bool, str]:
         """
@@ -58,6 +114,7 @@ class AITrader:
             Tuple[bool, str]: (Доступен ли рынок, Сообщение)
         """
         try:
+            import MetaTrader5 as mt5
             self.logger.info("🔍 Проверка доступности рынка...")
 
             # Проверяем соединение с MT5
@@ -73,29 +130,38 @@ class AITrader:
             test_symbols = [symbol.name for symbol in all_symbols[:10]]
             active_symbols = []
 
+            # Локальные ссылки на функции и константы MT5 для цикла проверки
+            symbol_info_fn = mt5.symbol_info
+            symbol_info_tick_fn = mt5.symbol_info_tick
+            trade_mode_full = mt5.SYMBOL_TRADE_MODE_FULL
+            trade_mode_close_only = mt5.SYMBOL_TRADE_MODE_CLOSEONLY
+            fromtimestamp = datetime.fromtimestamp
+            now = datetime.now
+
             for symbol in test_symbols:
                 try:
                     # Проверяем информацию о символе
-                    symbol_info = mt5.symbol_info(symbol)
+                    symbol_info = symbol_info_fn(symbol)
                     if symbol_info is None:
                         continue
 
                     # Проверяем, доступен ли символ для торговли
-                    if symbol_info.visible and symbol_info.trade_mode in [mt5.SYMBOL_TRADE_MODE_FULL,
-                                                                          mt5.SYMBOL_TRADE_MODE_CLOSEONLY]:
+                    trade_mode = symbol_info.trade_mode
+                    if symbol_info.visible and (trade_mode == trade_mode_full or trade_mode == trade_mode_close_only):
                         # Пробуем получить котировки разными способами
-                        tick = mt5.symbol_info_tick(symbol)
+                        tick = symbol_info_tick_fn(symbol)
 
                         if tick is not None:
                             # Проверяем время последнего обновления котировок
-                            tick_time = datetime.fromtimestamp(tick.time)
-                            time_diff = datetime.now() - tick_time
+                            tick_time = fromtimestamp(tick.time)
+                            time_diff = now() - tick_time
 
                             # Если котировки обновлялись не более 5 минут назад - рынок активен
                             if time_diff.total_seconds() <= 300:  # 5 минут
                                 active_symbols.append(symbol)
-                                self.logger.debug(
-                                    f"✅ Символ {symbol} активен (обновлен {time_diff.total_seconds():.0f} сек назад)")
+                                if self.logger.isEnabledFor(logging.DEBUG):
+                                    self.logger.debug(
+                                        f"✅ Символ {symbol} активен (обновлен {time_diff.total_seconds():.0f} сек назад)")
                             else:
                                 self.logger.warning(
                                     f"⚠️ Символ {symbol} не обновлялся {time_diff.total_seconds():.0f} сек")
@@ -137,6 +203,7 @@ class AITrader:
         """Инициализация приложения"""
         try:
             self.logger.info("🚀 Инициализация AI Trader...")
+            self._symbol_info_cache.clear()
 
             # Проверяем настройки
             try:
@@ -193,7 +260,7 @@ class AITrader:
         try:
             # Логируем важные изменения
             for symbol, data in market_data['symbols'].items():
-                change = data.get('price_change', 0)
+                change = data.price_change
                 if abs(change) > 0.5:  # Значительное изменение
                     self.logger.info(f"📊 {symbol}: изменение {change:.2f}%")
 
@@ -207,20 +274,23 @@ class AITrader:
     def _process_real_time_signals(self, market_data: Dict[str, any]):
         """Обработка сигналов в реальном времени"""
         try:
-            for symbol, data in market_data['symbols'].items():
-                # Получаем данные для анализа
-                historical_data = self.data_fetcher.get_rates(symbol, 'M5', count=100)
-                if historical_data is None or historical_data.empty:
-                    continue
+            # Метод не меняется внутри одного обновления - связываем его один раз
+            calculate_indicators = self.calculate_advanced_indicators
+
+            # Получаем данные для анализа по всем символам параллельно
+            rates = self.data_fetcher.get_rates_many(market_data['symbols'], 'M5', count=100)
 
-                # Применяем текущую стратегию
-                historical_data = self.calculate_advanced_indicators(historical_data)
-                signal_info = self.current_strategy.generate_signal(historical_data)
+            # Применяем текущую стратегию: сигналы по всем символам одним пакетом
+            indicators = {symbol: calculate_indicators(historical_data, live=True)
+                          for symbol, historical_data in rates.items()
+                          if historical_data is not None and not historical_data.empty}
+            signals = self.current_strategy.generate_signals_batch(indicators)
 
+            for symbol, signal_info in signals.items():
                 # Если сильный сигнал - выполняем сделку
                 if signal_info.get('strength', 0) > 70:
                     signal = signal_info.get('signal', 'HOLD')
-                    if signal in ['BUY', 'SELL']:
+                    if signal in _TRADE_SIGNALS:
                         self.logger.info(f"🎯 Реальный сигнал {signal} для {symbol} (сила: {signal_info['strength']}%)")
                         self._execute_trade(symbol, signal.lower(), signal_info['strength'])
 
@@ -281,14 +351,16 @@ class AITrader:
             self.logger.error(f"❌ Ошибка выбора стратегии: {e}")
             return None
 
-    def calculate_advanced_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+    def calculate_advanced_indicators(self, data: pd.DataFrame, live: bool = False) -> pd.DataFrame:
         """
         Расчет расширенных технических индикаторов с учетом выбранной стратегии
+
+        live=True - только то, что нужно сигналу по последнему бару (торговля в реальном времени)
         """
         try:
             if self.current_strategy:
                 # Используем индикаторы выбранной стратегии
-                data = self.current_strategy.calculate_indicators(data)
+                data = self.current_strategy.calculate_indicators(data, live=live)
                 self.logger.info(f"✅ Индикаторы стратегии '{self.current_strategy.name}' рассчитаны")
             else:
                 # Стандартный расчет индикаторов (для обратной совместимости)
@@ -328,6 +400,20 @@ class AITrader:
             self.logger.error(f"❌ Ошибка расчета стандартных индикаторов: {e}")
             return data
 
+    def _cached_get_rates(self, symbol: str, timeframe: str, count: int) -> Optional[pd.DataFrame]:
+        """Исторические данные с кэшем до закрытия текущего бара"""
+        return self.data_fetcher.get_rates_cached(symbol, timeframe, count=count)
+
+    def _prefetch_rates(self, symbol: str, timeframe: str, count: int):
+        """Фоновый прогрев кэша исторических данных, не блокирующий ввод пользователя"""
+        def worker():
+            try:
+                self._cached_get_rates(symbol, timeframe, count)
+            except Exception as e:
+                self.logger.debug(f"Предзагрузка данных {symbol} {timeframe} не удалась: {e}")
+
+        threading.Thread(target=worker, daemon=True).start()
+
     def run_training(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
         """Обучение на исторических данных за 5-6 недель"""
         try:
@@ -347,11 +433,22 @@ class AITrader:
                 self.logger.error("❌ Не удалось получить данные для обучения")
                 return None
 
-            # Рассчитываем базовые индикаторы
-            data = self.data_fetcher.calculate_technical_indicators(data)
+            # Если бары не изменились с прошлого обучения, индикаторы берем из кэша
+            cache_key = (symbol, timeframe)
+            bars_key = self._training_bars_key(data)
+            cached = self._training_cache.get(cache_key)
 
-            # Рассчитываем расширенные индикаторы
-            data = self.calculate_advanced_indicators(data)
+            if cached is not None and cached[0] == bars_key:
+                self.logger.info("♻️ Данные не изменились, используются рассчитанные ранее индикаторы")
+                data = cached[1].copy()
+            else:
+                # Рассчитываем базовые индикаторы
+                data = self.data_fetcher.calculate_technical_indicators(data)
+
+                # Рассчитываем расширенные индикаторы
+                data = self.calculate_advanced_indicators(data)
+
+                self._training_cache[cache_key] = (bars_key, data.copy())
 
             # Анализируем данные
             analysis = self.analyze_training_data(data)
@@ -365,6 +462,17 @@ class AITrader:
             self.logger.error(f"❌ Ошибка обучения: {e}")
             return None
 
+    def _training_bars_key(self, data: pd.DataFrame) -> tuple:
+        """Ключ набора баров для кэша обучения: границы, размер, последний бар и стратегия"""
+        return (
+            len(data),
+            data.index[0],
+            data.index[-1],
+            data['close'].iat[-1],
+            data['tick_volume'].iat[-1] if 'tick_volume' in data.columns else 0,
+            self.current_strategy.name if self.current_strategy else None
+        )
+
     def analyze_training_data(self, data: pd.DataFrame) -> str:
         """Анализ обучающих данных"""
         try:
@@ -414,9 +522,9 @@ class AITrader:
             data = self.data_fetcher.calculate_technical_indicators(data)
             data = self.calculate_advanced_indicators(data)
 
-            # Получаем последние значения
-            latest = data.iloc[-1]
-            previous = data.iloc[-2]
+            # Получаем последние значения: два последних бара одним to_numpy по срезу
+            columns = data.columns.tolist()
+            previous, latest = (dict(zip(columns, row)) for row in data.iloc[-2:].to_numpy().tolist())
 
             # Формируем анализ
             analysis = {
@@ -448,19 +556,13 @@ class AITrader:
             self.logger.error(f"❌ Ошибка анализа рынка: {e}")
             return {}
 
-    def _analyze_indicators(self, latest: pd.Series, previous: pd.Series) -> Dict[str, any]:
+    def _analyze_indicators(self, latest: Dict[str, float], previous: Dict[str, float]) -> Dict[str, any]:
         """Анализ значений индикаторов"""
         indicators = {}
 
         try:
             # RSI анализ
-            rsi = latest.get('rsi', 50)
-            if rsi < 30:
-                indicators['rsi'] = {'value': rsi, 'signal': 'OVERSOLD', 'strength': 'STRONG'}
-            elif rsi > 70:
-                indicators['rsi'] = {'value': rsi, 'signal': 'OVERBOUGHT', 'strength': 'STRONG'}
-            else:
-                indicators['rsi'] = {'value': rsi, 'signal': 'NEUTRAL', 'strength': 'WEAK'}
+            indicators['rsi'] = self._classify_oscillator(latest, 'rsi')
 
             # MACD анализ
             macd = latest.get('macd', 0)
@@ -484,14 +586,7 @@ class AITrader:
                 indicators['bollinger'] = {'value': price, 'signal': 'NEUTRAL', 'strength': 'WEAK'}
 
             # Stochastic анализ
-            stoch_k = latest.get('stoch_k', 50)
-            stoch_d = latest.get('stoch_d', 50)
-            if stoch_k < 20 and stoch_d < 20:
-                indicators['stochastic'] = {'value': stoch_k, 'signal': 'OVERSOLD', 'strength': 'STRONG'}
-            elif stoch_k > 80 and stoch_d > 80:
-                indicators['stochastic'] = {'value': stoch_k, 'signal': 'OVERBOUGHT', 'strength': 'STRONG'}
-            else:
-                indicators['stochastic'] = {'value': stoch_k, 'signal': 'NEUTRAL', 'strength': 'WEAK'}
+            indicators['stochastic'] = self._classify_oscillator(latest, 'stochastic')
 
             # Ichimoku анализ
             tenkan = latest.get('ichi_tenkan', price)
@@ -508,7 +603,21 @@ class AITrader:
 
         return indicators
 
-    def _generate_signals(self, latest: pd.Series, previous: pd.Series) -> Dict[str, int]:
+    def _classify_oscillator(self, latest: Dict[str, float], name: str) -> Dict[str, any]:
+        """Классификация осциллятора по таблице порогов _OSCILLATOR_THRESHOLDS"""
+        columns, default, low, high = self._OSCILLATOR_THRESHOLDS[name]
+        values = [latest.get(column, default) for column in columns]
+
+        if all(value < low for value in values):
+            signal, strength = 'OVERSOLD', 'STRONG'
+        elif all(value > high for value in values):
+            signal, strength = 'OVERBOUGHT', 'STRONG'
+        else:
+            signal, strength = 'NEUTRAL', 'WEAK'
+
+        return {'value': values[0], 'signal': signal, 'strength': strength}
+
+    def _generate_signals(self, latest: Dict[str, float], previous: Dict[str, float]) -> Dict[str, int]:
         """Генерация торговых сигналов"""
         signals = {'buy': 0, 'sell': 0, 'neutral': 0}
 
@@ -659,57 +768,64 @@ class AITrader:
             return
 
         try:
-            print("\n" + "=" * 70)
-            print("🎯 ГЛУБОКИЙ АНАЛИЗ РЫНКА")
-            print("=" * 70)
-            print(f"📊 Символ: {analysis.get('symbol', 'N/A')}")
-            print(f"⏰ Таймфрейм: {analysis.get('timeframe', 'N/A')}")
-            print(f"🎯 Стратегия: {self.current_strategy.name if self.current_strategy else 'Standard'}")
-            print(f"💰 Текущая цена: {analysis.get('current_price', 0):.5f}")
-            print(f"🕐 Время анализа: {analysis.get('timestamp', 'N/A')}")
-
-            print("\n📈 АНАЛИЗ ИНДИКАТОРОВ:")
+            # Собираем весь отчет и выводим его одной записью в stdout
+            lines = [
+                "\n" + _BANNER,
+                "🎯 ГЛУБОКИЙ АНАЛИЗ РЫНКА",
+                _BANNER,
+                f"📊 Символ: {analysis.get('symbol', 'N/A')}",
+                f"⏰ Таймфрейм: {analysis.get('timeframe', 'N/A')}",
+                f"🎯 Стратегия: {self.current_strategy.name if self.current_strategy else 'Standard'}",
+                f"💰 Текущая цена: {analysis.get('current_price', 0):.5f}",
+                f"🕐 Время анализа: {analysis.get('timestamp', 'N/A')}",
+                "\n📈 АНАЛИЗ ИНДИКАТОРОВ:",
+            ]
+
             indicators = analysis.get('indicators', {})
             for indicator, data in indicators.items():
                 signal = data.get('signal', 'NEUTRAL')
                 value = data.get('value', 0)
                 strength = data.get('strength', 'WEAK')
-                print(f"   {indicator.upper():<12}: {value:>8.2f} | {signal:<15} | {strength}")
+                lines.append(f"   {indicator.upper():<12}: {value:>8.2f} | {signal:<15} | {strength}")
 
-            print("\n🎯 ТОРГОВЫЕ СИГНАЛЫ:")
             signals = analysis.get('signals', {})
-            print(f"   📈 Покупка: {signals.get('buy', 0)} сигналов")
-            print(f"   📉 Продажа: {signals.get('sell', 0)} сигналов")
-            print(f"   ⚖️ Нейтрально: {signals.get('neutral', 0)} сигналов")
+            lines.extend([
+                "\n🎯 ТОРГОВЫЕ СИГНАЛЫ:",
+                f"   📈 Покупка: {signals.get('buy', 0)} сигналов",
+                f"   📉 Продажа: {signals.get('sell', 0)} сигналов",
+                f"   ⚖️ Нейтрально: {signals.get('neutral', 0)} сигналов",
+            ])
 
-            print("\n🔮 ПРЕДСКАЗАНИЕ:")
             prediction = analysis.get('prediction', {})
             direction_emoji = "🟢" if prediction.get('direction') == 'BULLISH' else "🔴" if prediction.get(
                 'direction') == 'BEARISH' else "⚪️"
-            print(f"   Направление: {direction_emoji} {prediction.get('direction', 'NEUTRAL')}")
-            print(f"   Уверенность: {prediction.get('confidence', 0)}%")
-            print(f"   Временной горизонт: {prediction.get('timeframe', 'SHORT')}")
-            print(f"   Уровень риска: {prediction.get('risk_level', 'MEDIUM')}")
+            lines.extend([
+                "\n🔮 ПРЕДСКАЗАНИЕ:",
+                f"   Направление: {direction_emoji} {prediction.get('direction', 'NEUTRAL')}",
+                f"   Уверенность: {prediction.get('confidence', 0)}%",
+                f"   Временной горизонт: {prediction.get('timeframe', 'SHORT')}",
+                f"   Уровень риска: {prediction.get('risk_level', 'MEDIUM')}",
+            ])
 
-            print("\n💡 РЕКОМЕНДАЦИЯ:")
             recommendation = analysis.get('recommendation', 'N/A')
-            print(f"   {recommendation}")
-            print("=" * 70)
+            lines.extend([
+                "\n💡 РЕКОМЕНДАЦИЯ:",
+                f"   {recommendation}",
+                _BANNER,
+            ])
+
+            print("\n".join(lines))
 
         except Exception as e:
             self.logger.error(f"❌ Ошибка отображения анализа: {e}")
 
     def training_completion_menu(self, symbol: str, timeframe: str, model: pd.DataFrame):
         """Меню после завершения обучения"""
+        # Пока пользователь выбирает действие, подгружаем данные для тестовой торговли
+        self._prefetch_rates(symbol, timeframe, count=50)
+
         while True:
-            print("\n" + "=" * 50)
-            print("🎓 ОБУЧЕНИЕ ЗАВЕРШЕНО")
-            print("=" * 50)
-            print("1 - 🧪 Начать тестовую торговлю")
-            print("2 - 🎯 Начать реальную торговлю")
-            print("3 - 🔍 Проанализировать рынок")
-            print("4 - 🔙 Вернуться в главное меню")
-            print("=" * 50)
+            print(_TRAINING_MENU)
 
             choice = input("\n🎯 Выберите действие (1-4): ").strip()
 
@@ -727,27 +843,29 @@ class AITrader:
 
     def run_test_trading(self, symbol: str, timeframe: str, model: pd.DataFrame):
         """Тестовая торговля с сохранением логов"""
+        test_logger = None
         try:
             self.logger.info(f"🧪 Начало тестовой торговли для {symbol} {timeframe}")
 
             # Создаем папку для логов тестов если ее нет
             log_dir = "Log_tests_sell"
-            if not os.path.exists(log_dir):
-                os.makedirs(log_dir)
+            os.makedirs(log_dir, exist_ok=True)
 
             # Создаем лог-файл с timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             log_file = os.path.join(log_dir, f"test_trading_{symbol}_{timestamp}.log")
 
             # Настраиваем логгер для тестовой торговли
-            test_logger = logging.getLogger(f'TestTrading_{symbol}_{timestamp}')
+            logger_name = f'TestTrading_{symbol}_{timestamp}'
+            test_logger = logging.getLogger(logger_name)
             test_logger.setLevel(logging.INFO)
             test_logger.handlers = []  # Очищаем существующие обработчики
 
-            # Файловый обработчик
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            file_handler.setFormatter(formatter)
+            # Файловый обработчик с ротацией; файл открывается только при первой записи
+            file_handler = RotatingFileHandler(
+                log_file, maxBytes=10 * 1024 * 1024, backupCount=10, encoding='utf-8', delay=True
+            )
+            file_handler.setFormatter(_TEST_FORMATTER)
             test_logger.addHandler(file_handler)
 
             test_logger.info("=" * 60)
@@ -767,21 +885,25 @@ class AITrader:
             test_logger.info(f"Результат: {'УСПЕХ' if success else 'ОШИБКА'}")
             test_logger.info("=" * 60)
 
-            # Удаляем обработчик, чтобы закрыть файл
-            for handler in test_logger.handlers[:]:
-                handler.close()
-                test_logger.removeHandler(handler)
-
             self.logger.info(f"✅ Тестовая торговля завершена. Логи сохранены в {log_file}")
 
         except Exception as e:
             self.logger.error(f"❌ Ошибка тестовой торговли: {e}")
-
-    def simulate_trading(self, symbol: str, timeframe: str, test_logger: logging.Logger) -> bool:
-        """Симуляция торговли для тестов"""
+        finally:
+            # Сбрасываем и закрываем файл даже после ошибки, удаляем одноразовый логгер из реестра
+            if test_logger is not None:
+                for handler in test_logger.handlers[:]:
+                    handler.flush()
+                    handler.close()
+                    test_logger.removeHandler(handler)
+                logging.Logger.manager.loggerDict.pop(test_logger.name, None)
+
+    def simulate_trading(self, symbol: str, timeframe: str, test_logger: logging.Logger,
+                         current_price: Optional[Dict[str, any]] = None) -> bool:
+        """Симуляция торговли для тестов (current_price можно передать, если цена уже получена)"""
         try:
             # Получаем текущие данные
-            data = self.data_fetcher.get_rates(symbol, timeframe, count=50)
+            data = self._cached_get_rates(symbol, timeframe, count=50)
             if data is None or data.empty:
                 test_logger.error("❌ Не удалось получить данные для тестирования")
                 return False
@@ -800,19 +922,21 @@ class AITrader:
                 signal = self._simple_moving_average_strategy(data)
                 test_logger.info("📊 Стратегия: Стандартная (MA)")
 
-            # Логируем решение
-            current_price = self.data_fetcher.get_current_price(symbol)
-            if current_price and isinstance(current_price, dict):
-                test_logger.info(
-                    f"💰 Текущая цена: Bid={current_price.get('bid', 0):.5f}, Ask={current_price.get('ask', 0):.5f}")
-            else:
-                test_logger.warning("⚠️ Не удалось получить текущую цену")
-
             # Гарантируем, что signal - строка
             if not isinstance(signal, str):
                 signal = "HOLD"
                 test_logger.warning("⚠️ Сигнал не является строкой, установлен в HOLD")
 
+            # Текущая цена нужна только для симуляции ордера, при HOLD запрос к MT5 не делаем
+            if signal in ("BUY", "SELL"):
+                if current_price is None:
+                    current_price = self.data_fetcher.get_current_price(symbol)
+                if current_price and isinstance(current_price, dict):
+                    test_logger.info(
+                        f"💰 Текущая цена: Bid={current_price.get('bid', 0):.5f}, Ask={current_price.get('ask', 0):.5f}")
+                else:
+                    test_logger.warning("⚠️ Не удалось получить текущую цену")
+
             test_logger.info(f"🎯 Сигнал: {signal}")
 
             # Симуляция ордеров
@@ -853,39 +977,51 @@ class AITrader:
         except Exception as e:
             self.logger.error(f"❌ Ошибка реальной торговли: {e}")
 
+    def _aggregate_positions(self, positions: List[Dict]) -> Tuple[float, List[str]]:
+        """Общая прибыль (с учетом свопа) и строки для отображения позиций за один проход"""
+        total_profit = 0
+        rows = []
+        for pos in positions:
+            profit = pos.get('profit', 0) + pos.get('swap', 0)
+            total_profit += profit
+            status = "🟢" if profit >= 0 else "🔴"
+            rows.append(
+                f"{status} {pos.get('symbol', 'N/A')} {pos.get('type', 'N/A')} {pos.get('volume', 0)} лот(ов) | "
+                f"Цена: {pos.get('open_price', 0):.5f} | Прибыль: {profit:.2f}"
+            )
+        return total_profit, rows
+
     def show_account_info(self):
         """Показывает информацию об аккаунте"""
         try:
             account_info = self.mt5.get_account_info()
             if account_info:
-                self.logger.info("=" * 50)
-                self.logger.info("📊 ИНФОРМАЦИЯ О СЧЕТЕ")
-                self.logger.info("=" * 50)
-                self.logger.info(f"👤 Логин: {account_info.get('login', 'N/A')}")
-                self.logger.info(f"🏢 Брокер: {account_info.get('company', 'N/A')}")
-                self.logger.info(f"💳 Баланс: {account_info.get('balance', 0):.2f} {account_info.get('currency', '')}")
-                self.logger.info(f"📈 Эквити: {account_info.get('equity', 0):.2f} {account_info.get('currency', '')}")
-                self.logger.info(
-                    f"🆓 Свободная маржа: {account_info.get('free_margin', 0):.2f} {account_info.get('currency', '')}")
-                self.logger.info(f"⚖️ Кредитное плечо: 1:{account_info.get('leverage', 0)}")
-                self.logger.info(f"🌐 Сервер: {account_info.get('server', 'N/A')}")
-
-            # Показываем открытые позиции
+                currency = account_info.get('currency', '')
+                self.logger.info("\n".join([
+                    "=" * 50,
+                    "📊 ИНФОРМАЦИЯ О СЧЕТЕ",
+                    "=" * 50,
+                    f"👤 Логин: {account_info.get('login', 'N/A')}",
+                    f"🏢 Брокер: {account_info.get('company', 'N/A')}",
+                    f"💳 Баланс: {account_info.get('balance', 0):.2f} {currency}",
+                    f"📈 Эквити: {account_info.get('equity', 0):.2f} {currency}",
+                    f"🆓 Свободная маржа: {account_info.get('free_margin', 0):.2f} {currency}",
+                    f"⚖️ Кредитное плечо: 1:{account_info.get('leverage', 0)}",
+                    f"🌐 Сервер: {account_info.get('server', 'N/A')}",
+                ]))
+
+            # Показываем открытые позиции одной записью лога
             positions = self.trader.get_open_positions()
             if positions:
-                self.logger.info("=" * 50)
-                self.logger.info(f"📋 ОТКРЫТЫЕ ПОЗИЦИИ ({len(positions)})")
-                self.logger.info("=" * 50)
-                total_profit = 0
-                for pos in positions:
-                    profit = pos.get('profit', 0) + pos.get('swap', 0)
-                    total_profit += profit
-                    status = "🟢" if profit >= 0 else "🔴"
-                    self.logger.info(
-                        f"{status} {pos.get('symbol', 'N/A')} {pos.get('type', 'N/A')} {pos.get('volume', 0)} лот(ов) | "
-                        f"Цена: {pos.get('open_price', 0):.5f} | Прибыль: {profit:.2f}"
-                    )
-                self.logger.info(f"💰 Общая прибыль: {total_profit:.2f}")
+                total_profit, rows = self._aggregate_positions(positions)
+                lines = [
+                    "=" * 50,
+                    f"📋 ОТКРЫТЫЕ ПОЗИЦИИ ({len(positions)})",
+                    "=" * 50,
+                    *rows,
+                    f"💰 Общая прибыль: {total_profit:.2f}",
+                ]
+                self.logger.info("\n".join(lines))
             else:
                 self.logger.info("📭 Нет открытых позиций")
 
@@ -907,7 +1043,7 @@ class AITrader:
             self.logger.info(f"🎯 Запуск стратегии '{self.current_strategy.name}' для {symbol} {timeframe}")
 
             # Получаем исторические данные
-            data = self.data_fetcher.get_rates(symbol, timeframe, count=100)
+            data = self._cached_get_rates(symbol, timeframe, count=100)
             if data is None or data.empty:
                 self.logger.error("❌ Не удалось получить данные")
                 return
@@ -924,13 +1060,9 @@ class AITrader:
             self.logger.info(f"📊 Сигнал стратегии: {signal} (сила: {strength:.1f}%)")
             self.logger.info(f"📝 {description}")
 
-            if signal == "BUY":
-                self.logger.info(f"📈 Сигнал BUY для {symbol}")
-                self._execute_trade(symbol, 'buy', strength)
-
-            elif signal == "SELL":
-                self.logger.info(f"📉 Сигнал SELL для {symbol}")
-                self._execute_trade(symbol, 'sell', strength)
+            if signal in _TRADE_SIGNALS:
+                self.logger.info(f"{_TRADE_SIGNALS[signal]} Сигнал {signal} для {symbol}")
+                self._execute_trade(symbol, signal.lower(), strength)
             else:
                 self.logger.info(f"⚖️ Нет сигнала для {symbol}")
 
@@ -940,20 +1072,24 @@ class AITrader:
     def _execute_trade(self, symbol: str, order_type: str, signal_strength: float):
         """Выполнение торговой операции с учетом силы сигнала"""
         try:
+            # Настройки риска читаем один раз
+            settings = self.settings
+            base_risk = settings.RISK_PERCENT
+            stoploss_pips = settings.STOPLOSS_PIPS
+
             # Рассчитываем объем на основе риска и силы сигнала
-            base_risk = self.settings.RISK_PERCENT
             adjusted_risk = base_risk * (signal_strength / 100.0) if signal_strength > 0 else base_risk
 
             volume = self.trader.calculate_position_size(
                 symbol,
                 risk_percent=adjusted_risk,
-                stop_loss_pips=self.settings.STOPLOSS_PIPS
+                stop_loss_pips=stoploss_pips
             )
 
             if volume:
                 # Корректируем стоп-лосс и тейк-профит на основе силы сигнала
-                sl = self.settings.STOPLOSS_PIPS if self.settings.ENABLE_STOPLOSS else 0.0
-                tp = self.settings.TAKEPROFIT_PIPS if self.settings.ENABLE_TAKEPROFIT else 0.0
+                sl = stoploss_pips if settings.ENABLE_STOPLOSS else 0.0
+                tp = settings.TAKEPROFIT_PIPS if settings.ENABLE_TAKEPROFIT else 0.0
 
                 # Увеличиваем тейк-профит для сильных сигналов
                 if signal_strength > 70:
@@ -982,24 +1118,22 @@ class AITrader:
     def _simple_moving_average_strategy(self, data: pd.DataFrame, short_window: int = 10, long_window: int = 30) -> str:
         """Простая стратегия на скользящих средних с исправлением ошибок"""
         try:
-            # Проверяем, что данных достаточно
-            if len(data) < long_window:
+            # Для сравнения нужны два последних значения длинной MA
+            closes = data['close'].to_numpy()
+            if closes.size < long_window + 1:
                 return "HOLD"
 
-            # Вычисляем скользящие средние
-            data['sma_short'] = data['close'].rolling(window=short_window).mean()
-            data['sma_long'] = data['close'].rolling(window=long_window).mean()
+            # Все четыре значения MA берем из одной накопленной суммы хвоста длиной long_window + 1:
+            # сумма окна = разность двух накопленных сумм, без повторного суммирования
+            prefix = np.concatenate(([0.0], np.cumsum(closes[-long_window - 1:])))
+            current_short = (prefix[-1] - prefix[-1 - short_window]) / short_window
+            previous_short = (prefix[-2] - prefix[-2 - short_window]) / short_window
+            current_long = (prefix[-1] - prefix[-1 - long_window]) / long_window
+            previous_long = (prefix[-2] - prefix[-2 - long_window]) / long_window
 
-            # Проверяем, что у нас есть достаточно данных для сравнения
-            if len(data) < 2 or data['sma_short'].isna().iloc[-1] or data['sma_long'].isna().iloc[-1]:
+            if not (np.isfinite(current_short) and np.isfinite(current_long)):
                 return "HOLD"
 
-            # Получаем последние значения
-            current_short = data['sma_short'].iloc[-1]
-            current_long = data['sma_long'].iloc[-1]
-            previous_short = data['sma_short'].iloc[-2]
-            previous_long = data['sma_long'].iloc[-2]
-
             # Сигнал на покупку: короткая MA пересекает длинную снизу вверх
             if previous_short <= previous_long and current_short > current_long:
                 return "BUY"
@@ -1014,6 +1148,15 @@ class AITrader:
             self.logger.error(f"Ошибка в стратегии MA: {str(e)}")
             return "HOLD"
 
+    def _get_symbol_info(self, symbol: str) -> Optional[Dict]:
+        """Спецификация символа с кэшированием на время сессии подключения"""
+        info = self._symbol_info_cache.get(symbol)
+        if info is None:
+            info = self.data_fetcher.get_symbol_info_full(symbol)
+            if info:
+                self._symbol_info_cache[symbol] = info
+        return info
+
     def run_test_trade(self, symbol: str):
         """Выполняет тестовую сделку"""
         try:
@@ -1025,29 +1168,35 @@ class AITrader:
             self.logger.info(f"🧪 Тестовая сделка для {symbol}")
 
             # Используем минимальный объем для теста
-            symbol_info = self.data_fetcher.get_symbol_info(symbol)
+            symbol_info = self._get_symbol_info(symbol)
             if symbol_info:
                 volume = symbol_info.get('volume_min', 0.01)
             else:
                 volume = 0.01
 
-            success, message = self.trader.send_order(
+            success, message, ticket = self.trader.send_order(
                 symbol=symbol,
                 order_type='buy',
                 volume=volume,
-                comment="Test Order"
+                comment="Test Order",
+                return_ticket=True
             )
 
             if success:
                 self.logger.info(f"✅ Тестовая сделка успешна: {message}")
 
-                # Закрываем тестовую сделку через 5 секунд
-                time.sleep(5)
-                positions = self.trader.get_open_positions(symbol)
-                for position in positions:
-                    if position.get('volume', 0) == volume:
-                        self.trader.close_position(position.get('ticket'))
-                        break
+                # Закрываем тестовую сделку сразу по ticket
+                closed = False
+                if ticket:
+                    closed, close_message = self.trader.close_position(ticket)
+
+                if not closed:
+                    # На неттинговых счетах ticket позиции может отличаться от ticket ордера
+                    positions = self.trader.get_open_positions(symbol)
+                    for position in positions:
+                        if position.get('volume', 0) == volume:
+                            self.trader.close_position(position.get('ticket'))
+                            break
             else:
                 self.logger.error(f"❌ Тестовая сделка не удалась: {message}")
 
@@ -1070,12 +1219,13 @@ class AITrader:
             self.logger.info(f"📋 Найдено {len(positions)} позиций для закрытия")
 
             # Показываем информацию о позициях перед закрытием
-            total_profit = sum(pos.get('profit', 0) + pos.get('swap', 0) for pos in positions)
+            total_profit, rows = self._aggregate_positions(positions)
+            self.logger.info("\n".join(rows))
             self.logger.info(f"💰 Общий P&L перед закрытием: {total_profit:.2f}")
 
             # Запрашиваем подтверждение
             confirm = input("Вы уверены, что хотите закрыть все позиции? (y/N): ").strip().lower()
-            if confirm not in ['y', 'yes', 'да']:
+            if confirm not in _YES_ANSWERS:
                 self.logger.info("❌ Закрытие позиций отменено")
                 return
 
@@ -1098,16 +1248,16 @@ class AITrader:
         except Exception as e:
             self.logger.error(f"❌ Ошибка при закрытии позиций: {e}")
 
-    def show_recent_data(self, symbol: str):
+    def show_recent_data(self, symbol: str, bars: int = 5):
         """Показывает последние данные по символу"""
         try:
-            data = self.data_fetcher.get_rates(symbol, self.settings.DEFAULT_TIMEFRAME, count=10)
+            data = self._cached_get_rates(symbol, self.settings.DEFAULT_TIMEFRAME, count=bars)
             if data is None or data.empty:
                 self.logger.error("❌ Не удалось получить данные")
                 return
 
-            print(f"\n📈 Последние 10 баров для {symbol}:")
-            print(data[['open', 'high', 'low', 'close']].tail(5))
+            print(f"\n📈 Последние {len(data)} баров для {symbol}:")
+            print(data[['open', 'high', 'low', 'close']].to_string())
         except Exception as e:
             self.logger.error(f"❌ Ошибка при получении данных: {e}")
 
@@ -1336,6 +1486,7 @@ class AITrader:
             if not all_symbols:
                 return []
 
+            all_symbols_set = set(all_symbols)
             selected_symbols = []
 
             while True:
@@ -1352,7 +1503,7 @@ class AITrader:
                 valid_symbols = []
 
                 for symbol in symbols_to_add:
-                    if symbol in all_symbols:
+                    if symbol in all_symbols_set:
                         valid_symbols.append(symbol)
                     else:
                         print(f"⚠️ Символ {symbol} не найден")
@@ -1463,8 +1614,8 @@ class AITrader:
                     symbol_data = market_data.get('symbols', {}).get(base_symbol)
 
                     if symbol_data:
-                        change = symbol_data.get('price_change', 0)
-                        price = symbol_data.get('bid', 0)
+                        change = symbol_data.price_change
+                        price = symbol_data.bid
                         change_icon = "🟢" if change > 0 else "🔴" if change < 0 else "⚪️"
                         print(f"   {change_icon} {base_symbol} → {actual_symbol}: {change:>+7.2f}% - {price:.5f}")
                     else:
@@ -1484,9 +1635,7 @@ class AITrader:
             print("=" * 40)
 
             # Показываем символы с группировкой
-            forex_symbols = [s for s in symbols if any(
-                currency in s for currency in ['USD', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'CHF', 'NZD'])]
-            other_symbols = [s for s in symbols if s not in forex_symbols]
+            forex_symbols, other_symbols, symbols_set = self._partition_symbols(symbols)
 
             if forex_symbols:
                 print("\n💱 ВАЛЮТНЫЕ ПАРЫ:")
@@ -1513,7 +1662,7 @@ class AITrader:
                         print("❌ Неверный номер. Попробуйте снова.")
                 else:
                     # Ищем символ по названию
-                    if choice.upper() in symbols:
+                    if choice.upper() in symbols_set:
                         selected = choice.upper()
                         print(f"✅ Выбран символ: {selected}")
                         return selected
@@ -1524,25 +1673,25 @@ class AITrader:
             self.logger.error(f"❌ Ошибка выбора символа: {e}")
             return None
 
+    def _partition_symbols(self, symbols: List[str]) -> Tuple[List[str], List[str], frozenset]:
+        """Разбиение символов на валютные пары и остальные (повторно для того же списка не считается)"""
+        key = tuple(symbols)
+        cached = self._symbol_partition
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2], cached[3]
+
+        forex_symbols, other_symbols = [], []
+        forex_search = self._FOREX_RE.search
+        for s in key:
+            (forex_symbols if forex_search(s) else other_symbols).append(s)
+
+        self._symbol_partition = (key, forex_symbols, other_symbols, frozenset(key))
+        return forex_symbols, other_symbols, self._symbol_partition[3]
+
     def select_timeframe(self) -> Optional[str]:
         """Выбор таймфрейма"""
-        timeframes = {
-            '1': ('M1', '1 минута'),
-            '2': ('M5', '5 минут'),
-            '3': ('M15', '15 минут'),
-            '4': ('M30', '30 минут'),
-            '5': ('H1', '1 час'),
-            '6': ('H4', '4 часа'),
-            '7': ('D1', '1 день'),
-            '8': ('W1', '1 неделя'),
-            '9': ('MN1', '1 месяц')
-        }
-
-        print("\n⏰ ДОСТУПНЫЕ ТАЙМФРЕЙМЫ:")
-        print("=" * 40)
-        for key, (tf, desc) in timeframes.items():
-            print(f"  {key}. {tf} - {desc}")
-        print("=" * 40)
+        timeframes = self._TIMEFRAMES
+        print(self._TIMEFRAME_MENU)
 
         while True:
             choice = input("\n🎯 Выберите таймфрейм (1-9): ").strip()
@@ -1559,6 +1708,7 @@ class AITrader:
     def analyze_symbol(self, symbol: str):
         """Анализ конкретного символа - метод для main.py"""
         try:
+            import MetaTrader5 as mt5
             print(f"\n🔍 АНАЛИЗ СИМВОЛА {symbol}")
             print("-" * 40)
 
@@ -1602,6 +1752,7 @@ class AITrader:
     def show_available_symbols(self):
         """Показать список доступных символов - метод для main.py"""
         try:
+            import MetaTrader5 as mt5
             symbols = mt5.symbols_get()
             print(f"\n📊 ДОСТУПНЫЕ СИМВОЛЫ ({len(symbols)}):")
             print("-" * 50)
@@ -1694,6 +1845,7 @@ class AITrader:
     def _open_position_flow(self, order_type: str):
         """Поток открытия позиции"""
         try:
+            import MetaTrader5 as mt5
             symbol = input("Введите символ: ").strip() or self.settings.DEFAULT_SYMBOL
             volume = float(input("Введите объем (например 0.01): ").strip() or "0.01")
 
@@ -1725,6 +1877,7 @@ class AITrader:
     def show_positions_and_orders(self):
         """Показать открытые позиции и ордера - метод для main.py"""
         try:
+            import MetaTrader5 as mt5
             print("\n📋 ОТКРЫТЫЕ ПОЗИЦИИ И ОРДЕРА")
             print("-" * 40)
 
@@ -1774,9 +1927,21 @@ class AITrader:
             self.stop_real_time_monitoring()
         if self.mt5:
             self.mt5.shutdown()
+        self._symbol_info_cache.clear()
         self.logger.info("👋 AI Trader остановлен")
 
 
+def _print_cli_usage():
+    """Подсказка по командам, если ни одна не указана"""
+    print("\n".join([
+        "🤖 Используйте 'python main.py' для интерактивного режима",
+        "📋 Доступные команды:",
+        "  python main.py --info",
+        "  python main.py --test --symbol EURUSD --timeframe H1",
+        "  python main.py --analyze --symbol EURUSD --timeframe H1",
+    ]))
+
+
 def main():
     """Главная функция"""
     parser = argparse.ArgumentParser(description='AI Trader for MT5')
@@ -1799,30 +1964,15 @@ def main():
         # Определяем символ по умолчанию если не указан
         symbol = args.symbol if args.symbol else trader.settings.DEFAULT_SYMBOL
 
-        if args.info:
-            # Показать информацию о счете
-            trader.show_account_info()
-
-        elif args.test:
-            # Тестовая сделка
-            trader.run_test_trade(symbol)
-
-        elif args.strategy:
-            # Запуск стратегии один раз
-            trader.run_simple_strategy(symbol, args.timeframe)
-
-        elif args.analyze:
-            # Анализ рынка
-            trader.market_analysis_flow()
-
-        else:
-            # Интерактивный режим
-            print("🤖 Используйте 'python main.py' для интерактивного режима")
-            print("📋 Доступные команды:")
-            print("  python main.py --info")
-            print("  python main.py --test --symbol EURUSD")
-            print("  python main.py --strategy --symbol EURUSD --timeframe H1")
-            print("  python main.py --analyze --symbol EURUSD --timeframe H1")
+        # Команды в порядке приоритета: выполняется первая указанная
+        commands = (
+            ('info', trader.show_account_info),
+            ('test', lambda: trader.run_test_trade(symbol)),
+            ('strategy', lambda: trader.run_simple_strategy(symbol, args.timeframe)),
+            ('analyze', trader.market_analysis_flow),
+        )
+        handler = next((command for flag, command in commands if getattr(args, flag)), _print_cli_usage)
+        handler()
 
     except KeyboardInterrupt:
         trader.logger.info("🛑 Получен сигнал прерывания")
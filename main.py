@@ -7,15 +7,11 @@ import os
 import sys
 import argparse
 import logging
-from datetime import datetime
 from dotenv import load_dotenv
 
 # Добавляем путь к корневой директории проекта
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ai_trader import AITrader
-from src.core.logger import setup_logger  # Исправленный импорт
-
 
 def parse_arguments():
     """Парсинг аргументов командной строки"""
@@ -26,63 +22,158 @@ def parse_arguments():
     parser.add_argument('--test', action='store_true', help='Запуск в тестовом режиме')
     parser.add_argument('--demo', action='store_true', help='Использовать демо-счет')
     parser.add_argument('--risk', type=float, help='Уровень риска в процентах')
+    parser.add_argument('--info', action='store_true', help='Показать информацию о счете и выйти')
+    parser.add_argument('--analyze', action='store_true',
+                        help='Провести анализ рынка по --symbol и --timeframe и выйти')
 
     return parser.parse_args()
 
 
+_MENU_LINE = "=" * 60
+
+# Тексты меню не меняются, поэтому собираются один раз и выводятся одним print
+_MAIN_MENU_TEXT = "\n".join([
+    "\n" + _MENU_LINE,
+    "🎯 AI TRADER - ГЛАВНОЕ МЕНЮ",
+    _MENU_LINE,
+    "1. 📊 Показать список символов",
+    "2. 🔍 Анализ символа",
+    "3. 📈 Технический анализ",
+    "4. 💰 Торговые операции",
+    "5. 📋 Мои позиции и ордера",
+    "6. ⚙️ Настройки рисков",
+    "7. 🧪 Тестовый режим",
+    "8. 🎯 Выбор стратегии торговли",
+    "9. 📡 Мониторинг рынка в реальном времени",
+    "0. ❌ Выход",
+    _MENU_LINE,
+])
+
+_STRATEGY_MENU_TEXT = "\n".join([
+    "\n" + _MENU_LINE,
+    "🎯 ВЫБОР СТРАТЕГИИ ТОРГОВЛИ",
+    _MENU_LINE,
+    "1. 📈 Улучшенная MA стратегия (Средний риск)",
+    "2. 📊 Улучшенная RSI стратегия (Низкий риск)",
+    "3. 🔄 Улучшенная MACD стратегия (Средний риск)",
+    "4. 📉 Улучшенная Bollinger Bands стратегия (Высокий риск)",
+    "5. 🚀 Продвинутая мульти-стратегия (Низкий риск)",
+    "6. 📋 Показать текущую стратегию",
+    "7. 🔙 Назад в главное меню",
+    _MENU_LINE,
+])
+
+_REALTIME_INFO_TEXT = "\n".join([
+    "\n" + _MENU_LINE,
+    "📡 МОНИТОРИНГ РЫНКА В РЕАЛЬНОМ ВРЕМЕНИ",
+    _MENU_LINE,
+    "💡 Управление мониторингом:",
+    "   • Введите 'stop' - остановить мониторинг",
+    "   • Введите 'status' - показать статус",
+    "   • Введите 'summary' - показать сводку рынка",
+    "   • Введите 'symbols' - показать отслеживаемые символы",
+    "   • Введите 'exit' - вернуться в меню",
+    _MENU_LINE,
+    "🔄 Мониторинг автоматически обновляет данные каждые 5 секунд",
+    "📊 Отслеживаются изменения цен, объемы и технические индикаторы",
+    "🎯 Система определяет общее состояние рынка (Бычье/Медвежье/Боковое)",
+    _MENU_LINE,
+])
+
+
 def show_menu():
     """Отображение главного меню"""
-    print("\n" + "=" * 60)
-    print("🎯 AI TRADER - ГЛАВНОЕ МЕНЮ")
-    print("=" * 60)
-    print("1. 📊 Показать список символов")
-    print("2. 🔍 Анализ символа")
-    print("3. 📈 Технический анализ")
-    print("4. 💰 Торговые операции")
-    print("5. 📋 Мои позиции и ордера")
-    print("6. ⚙️ Настройки рисков")
-    print("7. 🧪 Тестовый режим")
-    print("8. 🎯 Выбор стратегии торговли")
-    print("9. 📡 Мониторинг рынка в реальном времени")
-    print("0. ❌ Выход")
-    print("=" * 60)
+    print(_MAIN_MENU_TEXT)
 
 
 def show_strategy_menu():
     """Меню выбора стратегии"""
-    print("\n" + "=" * 60)
-    print("🎯 ВЫБОР СТРАТЕГИИ ТОРГОВЛИ")
-    print("=" * 60)
-    print("1. 📈 Улучшенная MA стратегия (Средний риск)")
-    print("2. 📊 Улучшенная RSI стратегия (Низкий риск)")
-    print("3. 🔄 Улучшенная MACD стратегия (Средний риск)")
-    print("4. 📉 Улучшенная Bollinger Bands стратегия (Высокий риск)")
-    print("5. 🚀 Продвинутая мульти-стратегия (Низкий риск)")
-    print("6. 📋 Показать текущую стратегию")
-    print("7. 🔙 Назад в главное меню")
-    print("=" * 60)
+    print(_STRATEGY_MENU_TEXT)
 
 
 def show_realtime_monitoring_info():
     """Информация о мониторинге в реальном времени"""
-    print("\n" + "=" * 60)
-    print("📡 МОНИТОРИНГ РЫНКА В РЕАЛЬНОМ ВРЕМЕНИ")
-    print("=" * 60)
-    print("💡 Управление мониторингом:")
-    print("   • Введите 'stop' - остановить мониторинг")
-    print("   • Введите 'status' - показать статус")
-    print("   • Введите 'summary' - показать сводку рынка")
-    print("   • Введите 'symbols' - показать отслеживаемые символы")
-    print("   • Введите 'exit' - вернуться в меню")
-    print("=" * 60)
-    print("🔄 Мониторинг автоматически обновляет данные каждые 5 секунд")
-    print("📊 Отслеживаются изменения цен, объемы и технические индикаторы")
-    print("🎯 Система определяет общее состояние рынка (Бычье/Медвежье/Боковое)")
-    print("=" * 60)
+    print(_REALTIME_INFO_TEXT)
+
+
+def _pause():
+    """Пауза перед возвратом в меню; без терминала (ввод из файла или конвейера) пропускается"""
+    if sys.stdin.isatty():
+        input("\n↵ Нажмите Enter для продолжения...")
+
+
+def _show_symbols(trader):
+    """Показать список символов"""
+    print("\n📊 ЗАГРУЗКА СПИСКА СИМВОЛОВ...")
+    trader.show_available_symbols()
+
+
+def _analyze_symbol(trader):
+    """Анализ символа"""
+    print("\n🔍 АНАЛИЗ СИМВОЛА")
+    symbol = input("Введите символ для анализа (например: EURUSD): ").strip()
+    if symbol:
+        trader.analyze_symbol(symbol)
+    else:
+        print("❌ Не указан символ для анализа")
+
+
+def _technical_analysis(trader):
+    """Технический анализ"""
+    print("\n📈 ТЕХНИЧЕСКИЙ АНАЛИЗ")
+    symbol = input("Введите символ для анализа: ").strip()
+    if symbol:
+        timeframe = input("Введите таймфрейм (M1, M5, H1, H4, D1) [H1]: ").strip() or 'H1'
+        trader.technical_analysis_flow(symbol, timeframe)
+    else:
+        print("❌ Не указан символ для анализа")
+
+
+def _trading_operations(trader):
+    """Торговые операции"""
+    print("\n💰 ТОРГОВЫЕ ОПЕРАЦИИ")
+    trader.trading_operations_flow()
+
+
+def _positions_and_orders(trader):
+    """Мои позиции и ордера"""
+    print("\n📋 МОИ ПОЗИЦИИ И ОРДЕРА")
+    trader.show_positions_and_orders()
+
+
+def _risk_settings(trader):
+    """Настройки рисков"""
+    print("\n⚙️ НАСТРОЙКИ УПРАВЛЕНИЯ РИСКАМИ")
+    try:
+        risk_percent = float(input("Введите уровень риска в % (например: 1.0): "))
+        trader.update_risk_management(risk_percent)
+        print(f"✅ Уровень риска установлен: {risk_percent}%")
+    except ValueError:
+        print("❌ Неверное значение риска")
+
+
+def _test_mode(trader):
+    """Тестовый режим"""
+    print("\n🧪 ТЕСТОВЫЙ РЕЖИМ")
+    trader.test_strategy_flow()
+
+
+def _realtime_monitoring(trader):
+    """Мониторинг рынка в реальном времени"""
+    print("\n📡 ЗАПУСК МОНИТОРИНГА РЫНКА...")
+    show_realtime_monitoring_info()
+    trader.real_time_monitoring_flow()
 
 
 def main():
     """Главная функция приложения"""
+    # Парсинг аргументов командной строки (до тяжелых импортов, чтобы --help отвечал сразу)
+    args = parse_arguments()
+
+    # pandas, numpy и MetaTrader5 загружаются только при реальном запуске
+    from ai_trader import AITrader
+    from src.core.logger import setup_logger
+
     # Загрузка переменных окружения
     load_dotenv()
 
@@ -90,9 +181,6 @@ def main():
     setup_logger()
     logger = logging.getLogger('AITrader')
 
-    # Парсинг аргументов командной строки
-    args = parse_arguments()
-
     try:
         # Инициализация AI Trader
         logger.info("🚀 Инициализация AI Trader...")
@@ -113,6 +201,17 @@ def main():
             trader.update_risk_management(args.risk)
             logger.info(f"✅ Уровень риска установлен: {args.risk}%")
 
+        # Разовые команды без главного меню
+        if args.info:
+            trader.show_account_info()
+            return
+
+        if args.analyze:
+            # Без интерактивного выбора: символ и таймфрейм берутся из аргументов
+            symbol = args.symbol or trader.settings.DEFAULT_SYMBOL
+            trader.display_market_analysis(trader.analyze_market(symbol, args.timeframe))
+            return
+
         # Запуск в тестовом режиме если указан аргумент
         if args.test:
             logger.info("🧪 Запуск в тестовом режиме...")
@@ -131,69 +230,13 @@ def main():
                 print("\n👋 До свидания!")
                 break
 
-            elif choice == '1':
-                # Показать список символов
-                print("\n📊 ЗАГРУЗКА СПИСКА СИМВОЛОВ...")
-                trader.show_available_symbols()
-
-            elif choice == '2':
-                # Анализ символа
-                print("\n🔍 АНАЛИЗ СИМВОЛА")
-                symbol = input("Введите символ для анализа (например: EURUSD): ").strip()
-                if symbol:
-                    trader.analyze_symbol(symbol)
-                else:
-                    print("❌ Не указан символ для анализа")
-
-            elif choice == '3':
-                # Технический анализ
-                print("\n📈 ТЕХНИЧЕСКИЙ АНАЛИЗ")
-                symbol = input("Введите символ для анализа: ").strip()
-                if symbol:
-                    timeframe = input("Введите таймфрейм (M1, M5, H1, H4, D1) [H1]: ").strip() or 'H1'
-                    trader.technical_analysis_flow(symbol, timeframe)
-                else:
-                    print("❌ Не указан символ для анализа")
-
-            elif choice == '4':
-                # Торговые операции
-                print("\n💰 ТОРГОВЫЕ ОПЕРАЦИИ")
-                trader.trading_operations_flow()
-
-            elif choice == '5':
-                # Мои позиции и ордера
-                print("\n📋 МОИ ПОЗИЦИИ И ОРДЕРА")
-                trader.show_positions_and_orders()
-
-            elif choice == '6':
-                # Настройки рисков
-                print("\n⚙️ НАСТРОЙКИ УПРАВЛЕНИЯ РИСКАМИ")
-                try:
-                    risk_percent = float(input("Введите уровень риска в % (например: 1.0): "))
-                    trader.update_risk_management(risk_percent)
-                    print(f"✅ Уровень риска установлен: {risk_percent}%")
-                except ValueError:
-                    print("❌ Неверное значение риска")
-
-            elif choice == '7':
-                # Тестовый режим
-                print("\n🧪 ТЕСТОВЫЙ РЕЖИМ")
-                trader.test_strategy_flow()
-
-            elif choice == '8':
-                # Выбор стратегии торговли
-                strategy_menu_loop(trader)
-
-            elif choice == '9':
-                # Мониторинг рынка в реальном времени
-                print("\n📡 ЗАПУСК МОНИТОРИНГА РЫНКА...")
-                show_realtime_monitoring_info()
-                trader.real_time_monitoring_flow()
-
+            handler = _MAIN_ACTIONS.get(choice)
+            if handler:
+                handler(trader)
             else:
                 print("❌ Неверный выбор. Попробуйте снова.")
 
-            input("\n↵ Нажмите Enter для продолжения...")
+            _pause()
 
     except KeyboardInterrupt:
         print("\n\n⚠️ Приложение прервано пользователем")
@@ -217,33 +260,13 @@ def strategy_menu_loop(trader):
         show_strategy_menu()
         choice = input("\n📝 Выберите стратегию: ").strip()
 
-        if choice == '1':
-            if trader.set_strategy('simple_ma'):
-                print("✅ Установлена Улучшенная MA стратегия")
-            else:
-                print("❌ Ошибка установки стратегии")
-
-        elif choice == '2':
-            if trader.set_strategy('rsi'):
-                print("✅ Установлена Улучшенная RSI стратегия")
-            else:
-                print("❌ Ошибка установки стратегии")
-
-        elif choice == '3':
-            if trader.set_strategy('macd'):
-                print("✅ Установлена Улучшенная MACD стратегия")
-            else:
-                print("❌ Ошибка установки стратегии")
-
-        elif choice == '4':
-            if trader.set_strategy('bollinger'):
-                print("✅ Установлена Улучшенная Bollinger Bands стратегия")
-            else:
-                print("❌ Ошибка установки стратегии")
+        if choice == '7':
+            break
 
-        elif choice == '5':
-            if trader.set_strategy('advanced'):
-                print("✅ Установлена Продвинутая мульти-стратегия")
+        if choice in _STRATEGY_ACTIONS:
+            name, title = _STRATEGY_ACTIONS[choice]
+            if trader.set_strategy(name):
+                print(f"✅ Установлена {title}")
             else:
                 print("❌ Ошибка установки стратегии")
 
@@ -257,20 +280,42 @@ def strategy_menu_loop(trader):
             else:
                 print("❌ Стратегия не установлена")
 
-        elif choice == '7':
-            break
-
         else:
             print("❌ Неверный выбор. Попробуйте снова.")
 
-        input("\n↵ Нажмите Enter для продолжения...")
+        _pause()
+
+
+# Пункты главного меню: выбор -> обработчик
+_MAIN_ACTIONS = {
+    '1': _show_symbols,
+    '2': _analyze_symbol,
+    '3': _technical_analysis,
+    '4': _trading_operations,
+    '5': _positions_and_orders,
+    '6': _risk_settings,
+    '7': _test_mode,
+    '8': strategy_menu_loop,
+    '9': _realtime_monitoring,
+}
+
+# Пункты меню стратегий: выбор -> (имя стратегии, название для вывода)
+_STRATEGY_ACTIONS = {
+    '1': ('simple_ma', "Улучшенная MA стратегия"),
+    '2': ('rsi', "Улучшенная RSI стратегия"),
+    '3': ('macd', "Улучшенная MACD стратегия"),
+    '4': ('bollinger', "Улучшенная Bollinger Bands стратегия"),
+    '5': ('advanced', "Продвинутая мульти-стратегия"),
+}
 
 
 if __name__ == "__main__":
-    print("🚀 AI TRADER - Automated Trading System")
-    print("📅 Запуск:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    print("🔒 Версия: AI Trader 1.2.0")
-    print("📊 Статус: PRODUCTION READY 🟢")
-    print("\n" + "=" * 50)
+    from datetime import datetime
+
+    print(f"🚀 AI TRADER - Automated Trading System\n"
+          f"📅 Запуск: {datetime.now():%Y-%m-%d %H:%M:%S}\n"
+          f"🔒 Версия: AI Trader 1.2.0\n"
+          f"📊 Статус: PRODUCTION READY 🟢\n"
+          f"\n{'=' * 50}")
 
     main()
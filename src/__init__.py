@@ -1,5 +1,12 @@
+from . import core
+from .core import setup_logger, Settings
 
 
-from .core import MT5, DataFetcher, Trader, setup_logger, Settings
+def __getattr__(name):
+    # MT5, DataFetcher и Trader берутся из src.core при первом обращении
+    if name in ('MT5', 'DataFetcher', 'Trader'):
+        return getattr(core, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ['MT5', 'DataFetcher', 'Trader', 'setup_logger', 'Settings']
@@ -1,20 +1,38 @@
-from .mt5 import MT5
-from .data import DataFetcher
-from .trader import Trader
+import importlib
+
 from .logger import setup_logger
 from .config import Settings
-from .realtime_monitor import RealTimeMonitor  # НОВЫЙ ИМПОРТ
-from .strategies import (
-    TradingStrategy, 
-    SimpleMAStrategy, 
-    RSIStrategy, 
-    MACDStrategy,
-    BollingerBandsStrategy,
-    AdvancedMultiStrategy,
-    get_available_strategies,
-    create_strategy,
-    STRATEGIES_REGISTRY
-)
+
+# Тяжелые модули (pandas, numpy, MetaTrader5) импортируются при первом обращении к имени
+_LAZY_EXPORTS = {
+    'MT5': '.mt5',
+    'DataFetcher': '.data',
+    'Trader': '.trader',
+    'RealTimeMonitor': '.realtime_monitor',
+    'TradingStrategy': '.strategies',
+    'SimpleMAStrategy': '.strategies',
+    'RSIStrategy': '.strategies',
+    'MACDStrategy': '.strategies',
+    'BollingerBandsStrategy': '.strategies',
+    'AdvancedMultiStrategy': '.strategies',
+    'get_available_strategies': '.strategies',
+    'create_strategy': '.strategies',
+    'STRATEGIES_REGISTRY': '.strategies',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_EXPORTS))
+
 
 __all__ = [
     'MT5', 
@@ -32,4 +50,4 @@ __all__ = [
     'get_available_strategies',
     'create_strategy',
     'STRATEGIES_REGISTRY'
-]
\ No newline at end of file
+]
@@ -1,48 +1,84 @@
 import os
-from typing import Optional
+from typing import Any, Callable, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def _parse_bool(value: str) -> bool:
+    """Преобразование строки из окружения в bool ('true' без учета регистра)"""
+    return value.lower() == 'true'
+
+
+# Допустимые стили торговли и их описания
+_STYLE_DESCRIPTIONS = {
+    'positional': 'Позиционная торговля (долгосрочная)',
+    'swing': 'Свинг-трейдинг (среднесрочная)',
+    'scalping': 'Скальпинг (краткосрочная)'
+}
+
+
+class _EnvSetting:
+    """
+    Настройка из переменной окружения, читаемая при первом обращении.
+
+    После первого чтения значение записывается в класс вместо дескриптора,
+    поэтому последующие обращения - обычный доступ к атрибуту.
+    """
+
+    def __init__(self, default: str, cast: Callable[[str], Any] = str):
+        self.default = default
+        self.cast = cast
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner):
+        value = self.cast(os.getenv(self.name, self.default))
+        setattr(owner, self.name, value)
+        return value
+
+
 class Settings:
     """Настройки приложения из переменных окружения"""
 
     # MT5 настройки
-    MT5_PATH: str = os.getenv('MT5_PATH', 'C:\\Program Files\\MetaTrader 5\\terminal64.exe')
-    MT5_LOGIN: int = int(os.getenv('MT5_LOGIN', '0'))
-    MT5_PASSWORD: str = os.getenv('MT5_PASSWORD', '')
-    MT5_SERVER: str = os.getenv('MT5_SERVER', '')
+    MT5_PATH: str = _EnvSetting('C:\\Program Files\\MetaTrader 5\\terminal64.exe')
+    MT5_LOGIN: int = _EnvSetting('0', int)
+    MT5_PASSWORD: str = _EnvSetting('')
+    MT5_SERVER: str = _EnvSetting('')
 
     # Стиль торговли
-    TRADING_STYLE: str = os.getenv('TRADING_STYLE', 'positional')  # positional, swing, scalping
+    TRADING_STYLE: str = _EnvSetting('positional')  # positional, swing, scalping
 
     # Торговые настройки
-    RISK_PERCENT: float = float(os.getenv('RISK_PERCENT', '1.0'))
-    DEFAULT_SYMBOL: str = os.getenv('DEFAULT_SYMBOL', 'EURUSD')
-    DEFAULT_TIMEFRAME: str = os.getenv('DEFAULT_TIMEFRAME', 'H1')
-    DEFAULT_VOLUME: float = float(os.getenv('DEFAULT_VOLUME', '0.01'))
+    RISK_PERCENT: float = _EnvSetting('1.0', float)
+    DEFAULT_SYMBOL: str = _EnvSetting('EURUSD')
+    DEFAULT_TIMEFRAME: str = _EnvSetting('H1')
+    DEFAULT_VOLUME: float = _EnvSetting('0.01', float)
 
     # Настройки стратегии
-    ENABLE_STOPLOSS: bool = os.getenv('ENABLE_STOPLOSS', 'true').lower() == 'true'
-    STOPLOSS_PIPS: float = float(os.getenv('STOPLOSS_PIPS', '50.0'))
-    ENABLE_TAKEPROFIT: bool = os.getenv('ENABLE_TAKEPROFIT', 'true').lower() == 'true'
-    TAKEPROFIT_PIPS: float = float(os.getenv('TAKEPROFIT_PIPS', '100.0'))
+    ENABLE_STOPLOSS: bool = _EnvSetting('true', _parse_bool)
+    STOPLOSS_PIPS: float = _EnvSetting('50.0', float)
+    ENABLE_TAKEPROFIT: bool = _EnvSetting('true', _parse_bool)
+    TAKEPROFIT_PIPS: float = _EnvSetting('100.0', float)
 
     # Настройки логирования
-    LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_LEVEL: str = _EnvSetting('INFO')
+
+    # Проверка выполняется один раз: прочитанные значения закрепляются в классе
+    _validated: bool = False
 
     @classmethod
     def validate(cls):
         """Проверка обязательных настроек"""
-        required_vars = ['MT5_LOGIN', 'MT5_PASSWORD', 'MT5_SERVER']
-        missing = []
-
-        for var in required_vars:
-            value = getattr(cls, var)
-            if not value:
-                missing.append(var)
+        if cls._validated:
+            return
 
+        missing = [name for name, value in (('MT5_LOGIN', cls.MT5_LOGIN),
+                                            ('MT5_PASSWORD', cls.MT5_PASSWORD),
+                                            ('MT5_SERVER', cls.MT5_SERVER)) if not value]
         if missing:
             raise ValueError(f"Отсутствуют обязательные настройки: {missing}")
 
@@ -50,24 +86,19 @@ class Settings:
             raise ValueError("MT5_LOGIN не может быть 0")
 
         # Проверка стиля торговли
-        valid_styles = ['positional', 'swing', 'scalping']
-        if cls.TRADING_STYLE not in valid_styles:
-            raise ValueError(f"Неверный стиль торговли. Допустимые значения: {valid_styles}")
+        if cls.TRADING_STYLE not in _STYLE_DESCRIPTIONS:
+            raise ValueError(f"Неверный стиль торговли. Допустимые значения: {list(_STYLE_DESCRIPTIONS)}")
+
+        cls._validated = True
 
     @classmethod
     def print_settings(cls):
         """Выводит текущие настройки (без пароля)"""
-        style_descriptions = {
-            'positional': 'Позиционная торговля (долгосрочная)',
-            'swing': 'Свинг-трейдинг (среднесрочная)',
-            'scalping': 'Скальпинг (краткосрочная)'
-        }
-
         settings = {
             'MT5_PATH': cls.MT5_PATH,
             'MT5_LOGIN': cls.MT5_LOGIN,
             'MT5_SERVER': cls.MT5_SERVER,
-            'TRADING_STYLE': f"{cls.TRADING_STYLE} ({style_descriptions.get(cls.TRADING_STYLE, 'неизвестно')})",
+            'TRADING_STYLE': f"{cls.TRADING_STYLE} ({_STYLE_DESCRIPTIONS.get(cls.TRADING_STYLE, 'неизвестно')})",
             'RISK_PERCENT': cls.RISK_PERCENT,
             'DEFAULT_SYMBOL': cls.DEFAULT_SYMBOL,
             'DEFAULT_TIMEFRAME': cls.DEFAULT_TIMEFRAME,
@@ -1,30 +1,206 @@
 import MetaTrader5 as mt5
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Union
+from typing import Optional, Dict, List, Set, Tuple, Union
 
 logger = logging.getLogger('DataFetcher')
 
+# Словарь для преобразования таймфреймов
+_TIMEFRAMES = {
+    'M1': mt5.TIMEFRAME_M1,
+    'M5': mt5.TIMEFRAME_M5,
+    'M15': mt5.TIMEFRAME_M15,
+    'M30': mt5.TIMEFRAME_M30,
+    'H1': mt5.TIMEFRAME_H1,
+    'H4': mt5.TIMEFRAME_H4,
+    'D1': mt5.TIMEFRAME_D1,
+    'W1': mt5.TIMEFRAME_W1,
+    'MN1': mt5.TIMEFRAME_MN1
+}
+
+# Длительность бара в секундах для кэша исторических данных
+_TIMEFRAME_SECONDS = {
+    'M1': 60, 'M5': 300, 'M15': 900, 'M30': 1800,
+    'H1': 3600, 'H4': 14400, 'D1': 86400, 'W1': 604800, 'MN1': 2592000
+}
+
+# Сколько разных запросов get_rates_cached держать в кэше
+_RATES_CACHE_SIZE = 64
+
+# Колонки баров MT5 (после time) в порядке полей copy_rates_*
+_RATE_COLUMNS = ('open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume')
+
+# Суффиксы, которые брокеры добавляют к именам символов
+_SYMBOL_SUFFIXES = ('', 'rfd', 'm', 'f', 'q', 'a', 'b', 'c', 'd', 'e')
+
+
+def _attach_columns(df: pd.DataFrame, columns: Dict[str, object]) -> pd.DataFrame:
+    """
+    Добавление набора колонок одной операцией вместо серии df[col] = ...
+
+    Уже существующие колонки перезаписываются на своих местах, новые добавляются
+    в конец в порядке словаря.
+    """
+    fresh = {}
+    for name, values in columns.items():
+        if name in df.columns:
+            df[name] = values
+        else:
+            if isinstance(values, pd.Series):
+                # Как и при df[col] = series, значения выравниваются по индексу
+                if not values.index.equals(df.index):
+                    values = values.reindex(df.index)
+                values = values.to_numpy()
+            fresh[name] = values
+    if not fresh:
+        return df
+    return pd.concat([df, pd.DataFrame(fresh, index=df.index)], axis=1)
+
+
+def _true_range(high, low, close) -> np.ndarray:
+    """
+    True Range: максимум из high-low, |high-prev_close|, |low-prev_close|.
+
+    Три ряда пишутся в один буфер (3, N) и сводятся одним np.maximum.reduce.
+    На первом баре предыдущего close нет, поэтому значение NaN.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+
+    ranges = np.empty((3, n))
+    np.subtract(high, low, out=ranges[0])
+    if n:
+        ranges[1:, 0] = np.nan
+        np.subtract(high[1:], close[:-1], out=ranges[1, 1:])
+        np.subtract(low[1:], close[:-1], out=ranges[2, 1:])
+        np.abs(ranges[1:, 1:], out=ranges[1:, 1:])
+    return np.maximum.reduce(ranges, axis=0)
+
+
+def _shift(values, periods: int = 1) -> np.ndarray:
+    """Сдвиг массива на periods баров вперед (как Series.shift), начало заполняется NaN"""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if periods < len(values):
+        result[periods:] = values[:len(values) - periods]
+    return result
+
+
+def _vwap(typical, volume) -> np.ndarray:
+    """
+    VWAP с начала данных: накопленная сумма typical*volume, деленная на накопленный объем.
+
+    Числитель и знаменатель накапливаются в один буфер (2, N) без промежуточных массивов.
+    Пока накопленный объем нулевой, значение NaN.
+    """
+    typical = np.asarray(typical, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+
+    sums = np.empty((2, len(typical)))
+    np.multiply(typical, volume, out=sums[0])
+    sums[1] = volume
+    np.cumsum(sums, axis=1, out=sums)
+
+    result = np.full(len(typical), np.nan)
+    np.divide(sums[0], sums[1], out=result, where=sums[1] > 0)
+    return result
+
+
+def _rolling_extreme(values, window: int, ufunc=np.maximum) -> np.ndarray:
+    """
+    Скользящий максимум (ufunc=np.maximum) или минимум (ufunc=np.minimum) за window баров.
+
+    Алгоритм van Herk/Gil-Werman - векторный аналог монотонной очереди: ряд режется на блоки
+    по window, внутри блоков считаются накопленные экстремумы слева и справа, и любое окно
+    собирается из суффикса одного блока и префикса следующего. Три прохода при любом окне.
+    Окно с NaN дает NaN, как и в rolling.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    result = np.full(n, np.nan)
+    if window <= n:
+        # Хвост дополняется нейтральным значением до целого числа блоков
+        neutral = -np.inf if ufunc is np.maximum else np.inf
+        blocks = np.concatenate([values, np.full(-n % window, neutral)]).reshape(-1, window)
+        prefix = ufunc.accumulate(blocks, axis=1).ravel()
+        suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+        result[window - 1:] = ufunc(suffix[:n - window + 1], prefix[window - 1:n])
+    return result
+
+
+def _rsi(close, period: int = 14) -> np.ndarray:
+    """
+    RSI по простым средним прироста и падения за period баров.
+
+    Прирост и падение берутся из одного np.diff, средние - из префиксных сумм.
+    Первый бар (без разницы) считается нулевым изменением, как и раньше.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.diff(close, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain, = _rolling_means(gain, (period,))
+    avg_loss, = _rolling_means(loss, (period,))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def _rolling_means(values, windows: Tuple[int, ...]) -> List[np.ndarray]:
+    """
+    Скользящие средние для нескольких окон по одной префиксной сумме.
+
+    Значения центрируются по первому элементу, чтобы не терять точность на крупных ценах.
+    При наличии NaN/inf используется rolling pandas, который восстанавливается после пропусков.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0 or not np.isfinite(values).all():
+        series = pd.Series(values)
+        return [series.rolling(window=w).mean().to_numpy() for w in windows]
+
+    offset = values[0]
+    csum = np.zeros(n + 1)
+    np.cumsum(values - offset, out=csum[1:])
+
+    means = []
+    for w in windows:
+        mean = np.full(n, np.nan)
+        if w <= n:
+            mean[w - 1:] = (csum[w:] - csum[:-w]) / w + offset
+        means.append(mean)
+    return means
+
 
 class DataFetcher:
+    # Тип цен OHLC в get_rates; np.float32 вдвое уменьшает объем данных для
+    # последующих расчетов (по умолчанию полная точность, как в MT5)
+    price_dtype = np.float64
+    PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
     def __init__(self, mt5_connection):
         self.mt5 = mt5_connection
         self.logger = logger
 
-        # Словарь для преобразования таймфреймов
-        self.timeframes = {
-            'M1': mt5.TIMEFRAME_M1,
-            'M5': mt5.TIMEFRAME_M5,
-            'M15': mt5.TIMEFRAME_M15,
-            'M30': mt5.TIMEFRAME_M30,
-            'H1': mt5.TIMEFRAME_H1,
-            'H4': mt5.TIMEFRAME_H4,
-            'D1': mt5.TIMEFRAME_D1,
-            'W1': mt5.TIMEFRAME_W1,
-            'MN1': mt5.TIMEFRAME_MN1
-        }
+        self.timeframes = _TIMEFRAMES
+        # Запомненные преобразования: исходная строка (в любом регистре) или готовая константа MT5
+        self._timeframe_cache = dict(self.timeframes)
+        self._timeframe_cache.update((tf, tf) for tf in self.timeframes.values())
+        # Запрошенное имя символа -> найденное и подготовленное имя у брокера
+        self._symbol_cache: Dict[str, str] = {}
+        # Символы, уже проверенные и выбранные в Market Watch (сбрасываются при потере соединения)
+        self._prepared: Set[str] = set()
+        # (symbol, timeframe, count, start_date, end_date) -> (время истечения, данные)
+        self._rates_cache: Dict[tuple, Tuple[float, pd.DataFrame]] = {}
+        # Кэш читают и пополняют фоновая предзагрузка и основной поток
+        self._rates_cache_lock = threading.Lock()
 
     def get_all_symbols(self) -> List[str]:
         """Получение списка всех доступных символов"""
@@ -66,6 +242,22 @@ class DataFetcher:
             self.logger.error(f"Ошибка получения списка символов: {str(e)}")
             return []
 
+    def find_symbols(self, base_symbol: str) -> Optional[List[str]]:
+        """
+        Имена символов брокера, содержащие base_symbol, одним запросом symbols_get по маске
+
+        Returns:
+            Список имен или None, если терминал не ответил
+        """
+        try:
+            symbols = mt5.symbols_get(group=f"*{base_symbol}*")
+            if symbols is None:
+                return None
+            return [s.name for s in symbols]
+        except Exception as e:
+            self.logger.error(f"Ошибка поиска символов {base_symbol}: {str(e)}")
+            return None
+
     def get_symbol_info_full(self, symbol: str) -> Optional[Dict]:
         """Получает подробную информацию о символе"""
         try:
@@ -96,6 +288,9 @@ class DataFetcher:
 
     def prepare_symbol(self, symbol: str) -> bool:
         """Подготавливает символ для торговли"""
+        if symbol in self._prepared:
+            return True
+
         try:
             # Проверяем существует ли символ
             symbol_info = mt5.symbol_info(symbol)
@@ -110,6 +305,7 @@ class DataFetcher:
                     self.logger.error(f"Не удалось выбрать символ {symbol}")
                     return False
 
+            self._prepared.add(symbol)
             return True
 
         except Exception as e:
@@ -120,39 +316,117 @@ class DataFetcher:
         """
         Поиск правильного имени символа с учетом суффиксов брокера
         """
-        possible_suffixes = ['', 'rfd', 'm', 'f', 'q', 'a', 'b', 'c', 'd', 'e']
-
-        for suffix in possible_suffixes:
+        for suffix in _SYMBOL_SUFFIXES:
             test_symbol = base_symbol + suffix
             if self._check_symbol_exists(test_symbol):
                 return test_symbol
 
         # Если не нашли с суффиксами, попробуем найти похожие символы
-        all_symbols = self.get_all_symbols()
-        if all_symbols:
-            for symbol in all_symbols:
-                if base_symbol in symbol:
-                    self.logger.info(f"🔍 Найден похожий символ: {symbol} для базового {base_symbol}")
-                    if self._check_symbol_exists(symbol):
-                        return symbol
+        for symbol in self._similar_symbols(base_symbol):
+            self.logger.info(f"🔍 Найден похожий символ: {symbol} для базового {base_symbol}")
+            if self._check_symbol_exists(symbol):
+                return symbol
 
         return None
 
+    def _similar_symbols(self, base_symbol: str) -> List[str]:
+        """
+        Символы брокера, содержащие base_symbol
+
+        Терминал отбирает их сам (find_symbols, один запрос по маске), поэтому после
+        переподключения или смены списка символов у брокера ответ всегда актуален.
+        Маска symbols_get не различает регистр - совпадение проверяется еще раз, как раньше.
+        """
+        return [symbol for symbol in self.find_symbols(base_symbol) or () if base_symbol in symbol]
+
     def _check_symbol_exists(self, symbol: str) -> bool:
         """Проверка существования символа"""
         try:
-            # Пробуем получить информацию о символе
-            symbol_info = self.get_symbol_info(symbol)
-            if symbol_info:
-                # Пробуем получить текущую цену
-                price = self.get_current_price(symbol)
-                return price is not None and price.get('bid', 0) > 0
-            return False
+            # Проверяем напрямую через MT5: get_current_price сам ищет символ и мог зациклиться
+            symbol_info = mt5.symbol_info(symbol)
+            if symbol_info is None:
+                return False
+            if not symbol_info.visible and not mt5.symbol_select(symbol, True):
+                return False
+            tick = mt5.symbol_info_tick(symbol)
+            return tick is not None and tick.bid > 0
         except Exception as e:
-            self.logger.debug(f"Символ {symbol} не доступен: {e}")
+            self.logger.debug("Символ %s не доступен: %s", symbol, e)
             return False
 
-    def get_rates(self, symbol: str, timeframe: str, count: int = 1000,
+    def _resolve_symbol(self, symbol: str) -> Optional[str]:
+        """Имя символа у брокера, готовое к работе (с авто-исправлением суффикса и кэшем)"""
+        cached = self._symbol_cache.get(symbol)
+        if cached is not None:
+            return cached
+
+        resolved = symbol
+        if not self.prepare_symbol(symbol):
+            # Пробуем найти правильный символ
+            correct_symbol = self.find_correct_symbol(symbol)
+            if not correct_symbol:
+                return None
+            self.logger.info(f"🔄 Авто-исправление символа: {symbol} -> {correct_symbol}")
+            if not self.prepare_symbol(correct_symbol):
+                return None
+            resolved = correct_symbol
+
+        self._symbol_cache[symbol] = resolved
+        return resolved
+
+    def resolve_timeframe(self, timeframe: Union[str, int]) -> Optional[int]:
+        """Преобразование таймфрейма ('H1', 'h1' или константа MT5) в константу MT5"""
+        tf = self._timeframe_cache.get(timeframe)
+        if tf is None and isinstance(timeframe, str):
+            tf = self.timeframes.get(timeframe.upper())
+            if tf is not None:
+                self._timeframe_cache[timeframe] = tf
+        return tf
+
+    def _copy_rates(self, symbol: str, timeframe: Union[str, int], count: int,
+                    start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> Optional[np.ndarray]:
+        """Бары MT5 в виде структурированного массива (общая часть get_rates и get_rates_arrays)"""
+        if not self.mt5.check_connection():
+            self.logger.error("Нет соединения с MT5")
+            # После переподключения терминал может не помнить выбранные символы
+            self._prepared.clear()
+            self._symbol_cache.clear()
+            return None
+
+        # Преобразуем таймфрейм
+        tf = self.resolve_timeframe(timeframe)
+        if tf is None:
+            self.logger.error(f"Неизвестный таймфрейм: {timeframe}")
+            return None
+
+        # Подготавливаем символ
+        requested_symbol = symbol
+        symbol = self._resolve_symbol(symbol)
+        if symbol is None:
+            return None
+
+        # Получаем данные в зависимости от параметров
+        if start_date and end_date:
+            rates = mt5.copy_rates_range(symbol, tf, start_date, end_date)
+        elif start_date:
+            rates = mt5.copy_rates_from(symbol, tf, start_date, count)
+        else:
+            rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
+
+        if rates is None:
+            self._symbol_cache.pop(requested_symbol, None)
+            error_code = mt5.last_error()
+            self.logger.error(f"Ошибка получения данных для {symbol}: {error_code}")
+            return None
+
+        if len(rates) == 0:
+            self.logger.warning(f"Нет данных для {symbol} {timeframe}")
+            return None
+
+        return np.asarray(rates)
+
+    def get_rates(self, symbol: str, timeframe: Union[str, int], count: int = 1000,
                   start_date: Optional[datetime] = None,
                   end_date: Optional[datetime] = None) -> Optional[pd.DataFrame]:
         """
@@ -160,7 +434,7 @@ class DataFetcher:
 
         Args:
             symbol: торговый символ
-            timeframe: таймфрейм ('M1', 'H1', 'D1' и т.д.)
+            timeframe: таймфрейм ('M1', 'H1', 'D1' и т.д.) или готовая константа MT5
             count: количество баров
             start_date: начальная дата
             end_date: конечная дата
@@ -169,82 +443,143 @@ class DataFetcher:
             DataFrame с данными или None в случае ошибки
         """
         try:
-            if not self.mt5.check_connection():
-                self.logger.error("Нет соединения с MT5")
+            rates = self._copy_rates(symbol, timeframe, count, start_date, end_date)
+            if rates is None:
                 return None
 
-            # Преобразуем таймфрейм
-            tf = self.timeframes.get(timeframe.upper())
-            if tf is None:
-                self.logger.error(f"Неизвестный таймфрейм: {timeframe}")
-                return None
+            # Преобразуем в DataFrame: индекс времени строим сразу из поля time
+            # (секунды эпохи приводятся к datetime64[s] без разбора через to_datetime),
+            # остальные поля берем по порядку под нашими именами колонок с их типами
+            fields = rates.dtype.names
+            index = pd.DatetimeIndex(rates[fields[0]].astype('datetime64[s]'), name='time')
+            columns = {column: rates[field] for column, field in zip(_RATE_COLUMNS, fields[1:])}
+            if self.price_dtype != np.float64:
+                for column in self.PRICE_COLUMNS:
+                    columns[column] = columns[column].astype(self.price_dtype)
+
+            # Вычисляемые колонки (арифметика на массивах, без выравнивания Series)
+            high = columns['high']
+            low = columns['low']
+            close = columns['close']
+            change = np.empty_like(close)
+            change[:1] = np.nan
+            np.subtract(close[1:], close[:-1], out=change[1:])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                price_change = np.empty_like(close)
+                price_change[:1] = np.nan
+                np.divide(change[1:], close[:-1], out=price_change[1:])
+            columns['price_change'] = price_change
+            columns['price_change_abs'] = change
+            columns['range'] = high - low
+            columns['typical_price'] = (high + low + close) / 3
+
+            # Фрейм строится одним конструктором: колонки одного типа лежат в общем
+            # непрерывном блоке, а не в отдельном блоке на каждое присваивание
+            df = pd.DataFrame(columns, index=index)
+
+            # Вызывается на каждый запрос баров: debug с отложенным форматированием
+            self.logger.debug("📊 Получено %d баров для %s %s", len(df), symbol, timeframe)
+            return df
 
-            # Подготавливаем символ
-            if not self.prepare_symbol(symbol):
-                # Пробуем найти правильный символ
-                correct_symbol = self.find_correct_symbol(symbol)
-                if correct_symbol:
-                    self.logger.info(f"🔄 Авто-исправление символа: {symbol} -> {correct_symbol}")
-                    symbol = correct_symbol
-                    if not self.prepare_symbol(symbol):
-                        return None
-                else:
-                    return None
+        except Exception as e:
+            self.logger.error(f"Ошибка в get_rates для {symbol}: {str(e)}")
+            return None
 
-            # Получаем данные в зависимости от параметров
-            if start_date and end_date:
-                rates = mt5.copy_rates_range(symbol, tf, start_date, end_date)
-            elif start_date:
-                rates = mt5.copy_rates_from(symbol, tf, start_date, count)
-            else:
-                rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
+    def get_rates_arrays(self, symbol: str, timeframe: Union[str, int], count: int = 1000,
+                         columns: Optional[Tuple[str, ...]] = None) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Последние бары в виде словаря массивов без построения DataFrame
 
+        Args:
+            symbol: торговый символ
+            timeframe: таймфрейм ('M1', 'H1', 'D1' и т.д.) или готовая константа MT5
+            count: количество баров
+            columns: нужные колонки ('time' - секунды эпохи, остальные как в get_rates);
+                по умолчанию все
+
+        Returns:
+            Словарь колонка -> массив или None в случае ошибки
+        """
+        try:
+            rates = self._copy_rates(symbol, timeframe, count)
             if rates is None:
-                error_code = mt5.last_error()
-                self.logger.error(f"Ошибка получения данных для {symbol}: {error_code}")
                 return None
 
-            if len(rates) == 0:
-                self.logger.warning(f"Нет данных для {symbol} {timeframe}")
-                return None
+            fields = dict(zip(('time',) + _RATE_COLUMNS, rates.dtype.names))
+            if columns is None:
+                columns = tuple(fields)
+            return {column: rates[fields[column]] for column in columns}
 
-            # Преобразуем в DataFrame
-            df = pd.DataFrame(rates)
-            df['time'] = pd.to_datetime(df['time'], unit='s')
-            df.set_index('time', inplace=True)
+        except Exception as e:
+            self.logger.error(f"Ошибка в get_rates_arrays для {symbol}: {str(e)}")
+            return None
 
-            # Переименовываем колонки для удобства
-            df.columns = ['open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume']
+    def get_rates_many(self, symbols: List[str], timeframe: Union[str, int], count: int = 1000,
+                       max_workers: int = 8) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Исторические данные сразу по нескольким символам
 
-            # Добавляем вычисляемые колонки
-            df['price_change'] = df['close'].pct_change()
-            df['price_change_abs'] = df['close'].diff()
-            df['range'] = df['high'] - df['low']
-            df['typical_price'] = (df['high'] + df['low'] + df['close']) / 3
+        Запросы к MT5 выполняются параллельно в пуле потоков: вызовы терминала
+        блокирующие и отпускают GIL, поэтому ожидания ответов перекрываются.
 
-            self.logger.info(f"📊 Получено {len(df)} баров для {symbol} {timeframe}")
-            return df
+        Returns:
+            Словарь символ -> DataFrame (или None), в порядке переданных символов
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+            futures = {symbol: executor.submit(self.get_rates, symbol, timeframe, count)
+                       for symbol in symbols}
+            return {symbol: future.result() for symbol, future in futures.items()}
+
+    def get_rates_cached(self, symbol: str, timeframe: str, count: int = 1000,
+                         start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None) -> Optional[pd.DataFrame]:
+        """
+        get_rates с кэшем до закрытия текущего бара (возвращается копия данных)
 
-        except Exception as e:
-            self.logger.error(f"Ошибка в get_rates для {symbol}: {str(e)}")
-            return None
+        Граница бара считается по эпохе UTC, поэтому для таймфреймов старше H1
+        (зависящих от часового пояса сервера) кэш живет не дольше текущего часа.
+        Вызывается из нескольких потоков: кэш меняется только под блокировкой,
+        запрос к MT5 выполняется вне ее.
+        """
+        key = (symbol, timeframe, count, start_date, end_date)
+        now = time.time()
+        with self._rates_cache_lock:
+            entry = self._rates_cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1].copy()
+
+        data = self.get_rates(symbol, timeframe, count=count, start_date=start_date, end_date=end_date)
+        if data is None or data.empty:
+            return data
+
+        period = min(_TIMEFRAME_SECONDS.get(str(timeframe).upper(), 60), 3600)
+        with self._rates_cache_lock:
+            if len(self._rates_cache) >= _RATES_CACHE_SIZE:
+                # Сначала убираем устаревшие записи, затем самую старую
+                for stale in [k for k, (expires, _) in self._rates_cache.items() if expires <= now]:
+                    del self._rates_cache[stale]
+                if len(self._rates_cache) >= _RATES_CACHE_SIZE:
+                    del self._rates_cache[next(iter(self._rates_cache))]
+
+            self._rates_cache.pop(key, None)
+            self._rates_cache[key] = ((now // period + 1) * period, data)
+        return data.copy()
 
     def get_current_price(self, symbol: str) -> Optional[Dict]:
         """Получает текущую цену символа"""
         try:
-            if not self.prepare_symbol(symbol):
-                # Пробуем найти правильный символ
-                correct_symbol = self.find_correct_symbol(symbol)
-                if correct_symbol:
-                    self.logger.info(f"🔄 Авто-исправление символа: {symbol} -> {correct_symbol}")
-                    symbol = correct_symbol
-                    if not self.prepare_symbol(symbol):
-                        return None
-                else:
-                    return None
+            requested_symbol = symbol
+            symbol = self._resolve_symbol(symbol)
+            if symbol is None:
+                return None
 
             tick = mt5.symbol_info_tick(symbol)
             if tick is None:
+                self._symbol_cache.pop(requested_symbol, None)
                 self.logger.error(f"Не удалось получить тик для {symbol}")
                 return None
 
@@ -260,6 +595,40 @@ class DataFetcher:
             self.logger.error(f"Ошибка получения текущей цены для {symbol}: {str(e)}")
             return None
 
+    def get_current_prices_bulk(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Текущие цены нескольких символов одним запросом symbols_get
+
+        Символы, которых нет в ответе терминала, в результат не попадают -
+        для них можно вызвать get_current_price. Так же пропускаются записи с нулевым bid
+        (символ не выбран в Market Watch, котировок в symbols_get нет): для них нужен
+        отдельный запрос тика.
+
+        spread - спред из SymbolInfo в пунктах (в get_current_price его нет).
+        """
+        wanted = set(symbols)
+        if not wanted:
+            return {}
+
+        try:
+            infos = mt5.symbols_get(group=",".join(sorted(wanted)))
+        except Exception as e:
+            self.logger.error(f"Ошибка получения цен символов: {str(e)}")
+            return {}
+
+        prices = {}
+        for info in infos or ():
+            if info.name in wanted and info.bid != 0:
+                prices[info.name] = {
+                    'bid': info.bid,
+                    'ask': info.ask,
+                    'last': info.last,
+                    'volume': info.volume,
+                    'spread': info.spread,
+                    'time': pd.to_datetime(info.time, unit='s')
+                }
+        return prices
+
     def calculate_technical_indicators(self, df: pd.DataFrame, trading_style: str = 'positional') -> pd.DataFrame:
         """
         Расширенный расчет технических индикаторов в зависимости от стиля торговли
@@ -272,7 +641,7 @@ class DataFetcher:
             DataFrame с рассчитанными индикаторами
         """
         try:
-            self.logger.info(f"🎯 Расчет индикаторов для стиля: {trading_style}")
+            self.logger.debug("🎯 Расчет индикаторов для стиля: %s", trading_style)
 
             if trading_style == 'positional':
                 return self._calculate_positional_indicators(df)
@@ -291,28 +660,23 @@ class DataFetcher:
     def _calculate_basic_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Базовые индикаторы для всех стилей"""
         try:
+            close = df['close']
+            new = {}
+
             # Скользящие средние (базовые)
-            df['sma_20'] = df['close'].rolling(window=20).mean()
-            df['sma_50'] = df['close'].rolling(window=50).mean()
+            new['sma_20'], new['sma_50'] = _rolling_means(close, (20, 50))
 
             # RSI
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            df['rsi'] = 100 - (100 / (1 + rs))
+            new['rsi'] = _rsi(close, 14)
 
             # ATR (Average True Range)
-            high_low = df['high'] - df['low']
-            high_close = np.abs(df['high'] - df['close'].shift())
-            low_close = np.abs(df['low'] - df['close'].shift())
-            true_range = np.maximum(np.maximum(high_low, high_close), low_close)
-            df['atr'] = true_range.rolling(window=14).mean()
+            true_range = _true_range(df['high'], df['low'], close)
+            new['atr'] = pd.Series(true_range, index=df.index).rolling(window=14).mean()
 
             # Волатильность
-            df['volatility'] = df['range'].rolling(window=20).mean()
+            new['volatility'] = _rolling_means(df['range'], (20,))[0]
 
-            return df
+            return _attach_columns(df, new)
 
         except Exception as e:
             self.logger.error(f"Ошибка расчета базовых индикаторов: {str(e)}")
@@ -323,38 +687,40 @@ class DataFetcher:
         try:
             # Базовые индикаторы
             df = self._calculate_basic_indicators(df)
+            close = df['close']
+            new = {}
 
             # Долгосрочные скользящие средние
-            df['sma_100'] = df['close'].rolling(window=100).mean()
-            df['sma_200'] = df['close'].rolling(window=200).mean()
-            df['ema_50'] = df['close'].ewm(span=50).mean()
-            df['ema_100'] = df['close'].ewm(span=100).mean()
+            new['sma_100'], new['sma_200'] = _rolling_means(close, (100, 200))
+            new['ema_50'] = close.ewm(span=50).mean()
+            new['ema_100'] = close.ewm(span=100).mean()
 
             # MACD для долгосрочных трендов
-            df['ema_12'] = df['close'].ewm(span=12).mean()
-            df['ema_26'] = df['close'].ewm(span=26).mean()
-            df['macd'] = df['ema_12'] - df['ema_26']
-            df['macd_signal'] = df['macd'].ewm(span=9).mean()
-            df['macd_histogram'] = df['macd'] - df['macd_signal']
+            new.update(self._calculate_macd(close))
 
             # Bollinger Bands для волатильности
-            df['bb_middle'] = df['close'].rolling(window=20).mean()
-            bb_std = df['close'].rolling(window=20).std()
-            df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-            df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-            df['bb_width'] = df['bb_upper'] - df['bb_lower']
-            df['bb_position'] = (df['close'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'])
+            bb_middle, bb_upper, bb_lower = self._calculate_bollinger_bands(close)
+            new['bb_middle'] = bb_middle
+            new['bb_upper'] = bb_upper
+            new['bb_lower'] = bb_lower
+            bb_width = bb_upper - bb_lower
+            new['bb_width'] = bb_width
+            with np.errstate(divide='ignore', invalid='ignore'):
+                new['bb_position'] = (close.to_numpy(dtype=np.float64) - bb_lower) / bb_width
 
             # Parabolic SAR для тренда
-            df['psar'] = self._calculate_psar(df)
+            new['psar'] = self._calculate_psar(df)
 
             # ADX для силы тренда
-            df['adx'] = self._calculate_adx(df)
+            new['adx'] = self._calculate_adx(df)
 
             # Volume-based indicators
-            df['volume_sma'] = df['tick_volume'].rolling(window=20).mean()
-            df['volume_ratio'] = df['tick_volume'] / df['volume_sma']
+            volume_sma = _rolling_means(df['tick_volume'], (20,))[0]
+            new['volume_sma'] = volume_sma
+            with np.errstate(divide='ignore', invalid='ignore'):
+                new['volume_ratio'] = df['tick_volume'].to_numpy(dtype=np.float64) / volume_sma
 
+            df = _attach_columns(df, new)
             self.logger.debug("✅ Позиционные индикаторы рассчитаны")
             return df
 
@@ -367,42 +733,44 @@ class DataFetcher:
         try:
             # Базовые индикаторы
             df = self._calculate_basic_indicators(df)
+            close = df['close']
+            new = {}
 
-            # Среднесрочные скользящие средние
-            df['sma_20'] = df['close'].rolling(window=20).mean()
-            df['sma_50'] = df['close'].rolling(window=50).mean()
-            df['ema_21'] = df['close'].ewm(span=21).mean()
-            df['ema_34'] = df['close'].ewm(span=34).mean()
-            df['ema_55'] = df['close'].ewm(span=55).mean()
+            # Среднесрочные скользящие средние (sma_20 и sma_50 уже есть в базовых)
+            new['ema_21'] = close.ewm(span=21).mean()
+            new['ema_34'] = close.ewm(span=34).mean()
+            new['ema_55'] = close.ewm(span=55).mean()
 
             # MACD
-            df['ema_12'] = df['close'].ewm(span=12).mean()
-            df['ema_26'] = df['close'].ewm(span=26).mean()
-            df['macd'] = df['ema_12'] - df['ema_26']
-            df['macd_signal'] = df['macd'].ewm(span=9).mean()
-            df['macd_histogram'] = df['macd'] - df['macd_signal']
+            new.update(self._calculate_macd(close))
+
+            # Экстремумы за 14 баров общие для Stochastic и Williams %R
+            high_14 = _rolling_extreme(df['high'], 14, np.maximum)
+            low_14 = _rolling_extreme(df['low'], 14, np.minimum)
 
             # Stochastic Oscillator
-            df['stoch_k'], df['stoch_d'] = self._calculate_stochastic(df)
+            new['stoch_k'], new['stoch_d'] = self._calculate_stochastic(df, high_max=high_14, low_min=low_14)
 
             # Williams %R
-            df['williams_r'] = self._calculate_williams_r(df)
+            new['williams_r'] = self._calculate_williams_r(df, highest_high=high_14, lowest_low=low_14)
 
             # CCI (Commodity Channel Index)
-            df['cci'] = self._calculate_cci(df)
+            new['cci'] = self._calculate_cci(df)
 
             # Bollinger Bands
-            df['bb_middle'] = df['close'].rolling(window=20).mean()
-            bb_std = df['close'].rolling(window=20).std()
-            df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-            df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
+            new['bb_middle'], new['bb_upper'], new['bb_lower'] = self._calculate_bollinger_bands(close)
 
-            # Momentum
-            df['momentum'] = df['close'] - df['close'].shift(10)
+            # Momentum (сдвинутый close считается один раз и для Rate of Change)
+            close_values = close.to_numpy(dtype=np.float64)
+            close_10 = _shift(close_values, 10)
+            momentum = close_values - close_10
+            new['momentum'] = momentum
 
             # Rate of Change
-            df['roc'] = ((df['close'] - df['close'].shift(10)) / df['close'].shift(10)) * 100
+            with np.errstate(divide='ignore', invalid='ignore'):
+                new['roc'] = momentum / close_10 * 100
 
+            df = _attach_columns(df, new)
             self.logger.debug("✅ Свинг-индикаторы рассчитаны")
             return df
 
@@ -415,45 +783,50 @@ class DataFetcher:
         try:
             # Базовые индикаторы
             df = self._calculate_basic_indicators(df)
+            close = df['close']
+            new = {}
 
             # Краткосрочные скользящие средние
-            df['sma_5'] = df['close'].rolling(window=5).mean()
-            df['sma_10'] = df['close'].rolling(window=10).mean()
-            df['sma_20'] = df['close'].rolling(window=20).mean()
-            df['ema_8'] = df['close'].ewm(span=8).mean()
-            df['ema_13'] = df['close'].ewm(span=13).mean()
-            df['ema_21'] = df['close'].ewm(span=21).mean()
+            new['sma_5'], new['sma_10'] = _rolling_means(close, (5, 10))
+            new['ema_8'] = close.ewm(span=8).mean()
+            new['ema_13'] = close.ewm(span=13).mean()
+            new['ema_21'] = close.ewm(span=21).mean()
 
             # Bollinger Bands для скальпинга
-            df['bb_middle'] = df['close'].rolling(window=20).mean()
-            bb_std = df['close'].rolling(window=20).std()
-            df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-            df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-            df['bb_squeeze'] = (df['bb_upper'] - df['bb_lower']) / df['bb_middle']
+            bb_middle, bb_upper, bb_lower = self._calculate_bollinger_bands(close)
+            new['bb_middle'] = bb_middle
+            new['bb_upper'] = bb_upper
+            new['bb_lower'] = bb_lower
+            new['bb_squeeze'] = (bb_upper - bb_lower) / bb_middle
 
             # Stochastic RSI
-            df['stoch_rsi'] = self._calculate_stoch_rsi(df)
+            new['stoch_rsi'] = self._calculate_stoch_rsi(df, rsi=df['rsi'].to_numpy())
 
             # VWAP (Volume Weighted Average Price)
-            df['vwap'] = (df['typical_price'] * df['tick_volume']).cumsum() / df['tick_volume'].cumsum()
+            new['vwap'] = _vwap(df['typical_price'], df['tick_volume'])
 
             # Momentum indicators
-            df['momentum_5'] = df['close'] - df['close'].shift(5)
-            df['momentum_10'] = df['close'] - df['close'].shift(10)
+            close_values = close.to_numpy(dtype=np.float64)
+            momentum_5 = close_values - _shift(close_values, 5)
+            new['momentum_5'] = momentum_5
+            new['momentum_10'] = close_values - _shift(close_values, 10)
 
             # Price acceleration
-            df['acceleration'] = df['momentum_5'] - df['momentum_5'].shift(1)
+            new['acceleration'] = momentum_5 - _shift(momentum_5, 1)
 
             # Ichimoku Cloud (упрощенная версия)
-            df = self._calculate_ichimoku(df)
+            new.update(self._calculate_ichimoku(df))
 
             # Volume-based indicators
-            df['volume_ema'] = df['tick_volume'].ewm(span=20).mean()
-            df['volume_ratio'] = df['tick_volume'] / df['volume_ema']
+            volume_ema = df['tick_volume'].ewm(span=20).mean().to_numpy()
+            new['volume_ema'] = volume_ema
+            with np.errstate(divide='ignore', invalid='ignore'):
+                new['volume_ratio'] = df['tick_volume'].to_numpy(dtype=np.float64) / volume_ema
 
-            # Spread analysis
-            df['spread_ratio'] = df['spread'] / df['atr']
+                # Spread analysis
+                new['spread_ratio'] = df['spread'].to_numpy(dtype=np.float64) / df['atr'].to_numpy(dtype=np.float64)
 
+            df = _attach_columns(df, new)
             self.logger.debug("✅ Скальпинг-индикаторы рассчитаны")
             return df
 
@@ -461,54 +834,67 @@ class DataFetcher:
             self.logger.error(f"Ошибка расчета скальпинг-индикаторов: {str(e)}")
             return df
 
+    def _calculate_macd(self, close: pd.Series) -> Dict[str, pd.Series]:
+        """MACD (12, 26, 9): колонки ema_12, ema_26, macd, macd_signal, macd_histogram"""
+        ema_12 = close.ewm(span=12).mean()
+        ema_26 = close.ewm(span=26).mean()
+        macd = ema_12 - ema_26
+        macd_signal = macd.ewm(span=9).mean()
+        return {
+            'ema_12': ema_12,
+            'ema_26': ema_26,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_histogram': macd - macd_signal
+        }
+
+    def _calculate_bollinger_bands(self, close: pd.Series, period: int = 20,
+                                   num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Расчет полос Боллинджера, возвращает массивы (middle, upper, lower)"""
+        rolling = close.rolling(window=period)
+        middle = rolling.mean().to_numpy()
+        band = rolling.std().to_numpy() * num_std
+        return middle, middle + band, middle - band
+
     def _calculate_psar(self, df: pd.DataFrame, af_start: float = 0.02, af_increment: float = 0.02,
                         af_max: float = 0.2) -> pd.Series:
         """Расчет Parabolic SAR"""
         try:
-            high = df['high'].values
-            low = df['low'].values
-            close = df['close'].values
+            # Цикл скалярный, поэтому работаем с float из списков, а не с элементами numpy
+            high = df['high'].tolist()
+            low = df['low'].tolist()
+            close = df['close'].tolist()
 
-            psar = np.zeros(len(df))
-            trend = np.zeros(len(df))
+            psar = [0.0] * len(high)
             af = af_start
             ep = low[0] if close[0] > close[1] else high[0]
             sar = high[0] if close[0] > close[1] else low[0]
+            uptrend = False  # на первых двух барах тренд не определен - считаем как нисходящий
 
-            for i in range(2, len(df)):
-                reverse = False
-
-                if trend[i - 1] == 1:  # uptrend
+            for i in range(2, len(high)):
+                if uptrend:
                     sar = sar + af * (ep - sar)
                     if low[i] < sar:
-                        trend[i] = -1
+                        uptrend = False
                         sar = ep
                         af = af_start
                         ep = low[i]
-                        reverse = True
                     else:
-                        trend[i] = 1
                         if high[i] > ep:
                             ep = high[i]
                             af = min(af + af_increment, af_max)
-                else:  # downtrend
+                        sar = min(sar, low[i - 1], low[i - 2])
+                else:
                     sar = sar - af * (sar - ep)
                     if high[i] > sar:
-                        trend[i] = 1
+                        uptrend = True
                         sar = ep
                         af = af_start
                         ep = high[i]
-                        reverse = True
                     else:
-                        trend[i] = -1
                         if low[i] < ep:
                             ep = low[i]
                             af = min(af + af_increment, af_max)
-
-                if not reverse:
-                    if trend[i] == 1:
-                        sar = min(sar, low[i - 1], low[i - 2])
-                    else:
                         sar = max(sar, high[i - 1], high[i - 2])
 
                 psar[i] = sar
@@ -522,44 +908,47 @@ class DataFetcher:
     def _calculate_adx(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
         """Расчет ADX (Average Directional Index)"""
         try:
-            high = df['high']
-            low = df['low']
-            close = df['close']
+            high = df['high'].to_numpy(dtype=np.float64)
+            low = df['low'].to_numpy(dtype=np.float64)
 
             # Calculate +DM and -DM
-            up_move = high - high.shift(1)
-            down_move = low.shift(1) - low
+            up_move = high - _shift(high, 1)
+            down_move = _shift(low, 1) - low
 
-            plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0)
-            minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0)
+            plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+            minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
 
             # Calculate True Range
-            tr1 = high - low
-            tr2 = abs(high - close.shift(1))
-            tr3 = abs(low - close.shift(1))
-            tr = np.maximum(np.maximum(tr1, tr2), tr3)
+            tr = _true_range(high, low, df['close'])
 
             # Smooth the values
-            plus_di = 100 * (pd.Series(plus_dm).rolling(window=period).mean() /
-                             pd.Series(tr).rolling(window=period).mean())
-            minus_di = 100 * (pd.Series(minus_dm).rolling(window=period).mean() /
-                              pd.Series(tr).rolling(window=period).mean())
+            plus_mean, = _rolling_means(plus_dm, (period,))
+            minus_mean, = _rolling_means(minus_dm, (period,))
+            tr_mean, = _rolling_means(tr, (period,))
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                plus_di = 100 * plus_mean / tr_mean
+                minus_di = 100 * minus_mean / tr_mean
 
-            # Calculate DX and ADX
-            dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-            adx = dx.rolling(window=period).mean()
+                # Calculate DX and ADX
+                dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+            adx, = _rolling_means(dx, (period,))
 
-            return adx
+            return pd.Series(adx, index=df.index)
 
         except Exception as e:
             self.logger.error(f"Ошибка расчета ADX: {str(e)}")
             return pd.Series(np.nan, index=df.index)
 
-    def _calculate_stochastic(self, df: pd.DataFrame, k_period: int = 14, d_period: int = 3) -> tuple:
-        """Расчет Stochastic Oscillator"""
+    def _calculate_stochastic(self, df: pd.DataFrame, k_period: int = 14, d_period: int = 3,
+                              high_max: Optional[pd.Series] = None,
+                              low_min: Optional[pd.Series] = None) -> tuple:
+        """Расчет Stochastic Oscillator (экстремумы за k_period можно передать готовыми)"""
         try:
-            low_min = df['low'].rolling(window=k_period).min()
-            high_max = df['high'].rolling(window=k_period).max()
+            if low_min is None:
+                low_min = _rolling_extreme(df['low'], k_period, np.minimum)
+            if high_max is None:
+                high_max = _rolling_extreme(df['high'], k_period, np.maximum)
 
             stoch_k = 100 * ((df['close'] - low_min) / (high_max - low_min))
             stoch_d = stoch_k.rolling(window=d_period).mean()
@@ -570,11 +959,15 @@ class DataFetcher:
             self.logger.error(f"Ошибка расчета Stochastic: {str(e)}")
             return pd.Series(np.nan, index=df.index), pd.Series(np.nan, index=df.index)
 
-    def _calculate_williams_r(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
-        """Расчет Williams %R"""
+    def _calculate_williams_r(self, df: pd.DataFrame, period: int = 14,
+                              highest_high: Optional[pd.Series] = None,
+                              lowest_low: Optional[pd.Series] = None) -> pd.Series:
+        """Расчет Williams %R (экстремумы за period можно передать готовыми)"""
         try:
-            highest_high = df['high'].rolling(window=period).max()
-            lowest_low = df['low'].rolling(window=period).min()
+            if highest_high is None:
+                highest_high = _rolling_extreme(df['high'], period, np.maximum)
+            if lowest_low is None:
+                lowest_low = _rolling_extreme(df['low'], period, np.minimum)
 
             williams_r = -100 * ((highest_high - df['close']) / (highest_high - lowest_low))
             return williams_r
@@ -586,32 +979,37 @@ class DataFetcher:
     def _calculate_cci(self, df: pd.DataFrame, period: int = 20) -> pd.Series:
         """Расчет CCI (Commodity Channel Index)"""
         try:
-            typical_price = (df['high'] + df['low'] + df['close']) / 3
-            sma = typical_price.rolling(window=period).mean()
-            mad = typical_price.rolling(window=period).apply(
-                lambda x: np.abs(x - x.mean()).mean(), raw=False
-            )
+            typical_price = ((df['high'] + df['low'] + df['close']) / 3).to_numpy(dtype=np.float64)
+            sma = np.full(len(typical_price), np.nan)
+            mad = np.full(len(typical_price), np.nan)
 
-            cci = (typical_price - sma) / (0.015 * mad)
-            return cci
+            # Среднее абсолютное отклонение от среднего своего окна - сразу по всем окнам
+            if len(typical_price) >= period:
+                windows = sliding_window_view(typical_price, period)
+                window_mean = windows.mean(axis=1)
+                sma[period - 1:] = window_mean
+                mad[period - 1:] = np.abs(windows - window_mean[:, None]).mean(axis=1)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cci = (typical_price - sma) / (0.015 * mad)
+            return pd.Series(cci, index=df.index)
 
         except Exception as e:
             self.logger.error(f"Ошибка расчета CCI: {str(e)}")
             return pd.Series(np.nan, index=df.index)
 
-    def _calculate_stoch_rsi(self, df: pd.DataFrame, rsi_period: int = 14, stoch_period: int = 14) -> pd.Series:
-        """Расчет Stochastic RSI"""
+    def _calculate_stoch_rsi(self, df: pd.DataFrame, rsi_period: int = 14, stoch_period: int = 14,
+                             rsi: Optional[np.ndarray] = None) -> pd.Series:
+        """Расчет Stochastic RSI (готовый RSI с тем же периодом можно передать в rsi)"""
         try:
             # Calculate RSI first
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=rsi_period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
+            if rsi is None:
+                rsi = _rsi(df['close'], rsi_period)
+            rsi = pd.Series(rsi, index=df.index)
 
             # Calculate Stochastic RSI
-            rsi_min = rsi.rolling(window=stoch_period).min()
-            rsi_max = rsi.rolling(window=stoch_period).max()
+            rsi_min = _rolling_extreme(rsi, stoch_period, np.minimum)
+            rsi_max = _rolling_extreme(rsi, stoch_period, np.maximum)
 
             stoch_rsi = (rsi - rsi_min) / (rsi_max - rsi_min)
             return stoch_rsi
@@ -620,30 +1018,36 @@ class DataFetcher:
             self.logger.error(f"Ошибка расчета Stochastic RSI: {str(e)}")
             return pd.Series(np.nan, index=df.index)
 
-    def _calculate_ichimoku(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Расчет упрощенного Ichimoku Cloud"""
+    def _calculate_ichimoku(self, df: pd.DataFrame) -> Dict[str, pd.Series]:
+        """Расчет упрощенного Ichimoku Cloud, возвращает новые колонки"""
         try:
             # Tenkan-sen (Conversion Line)
-            nine_period_high = df['high'].rolling(window=9).max()
-            nine_period_low = df['low'].rolling(window=9).min()
-            df['tenkan_sen'] = (nine_period_high + nine_period_low) / 2
+            nine_period_high = _rolling_extreme(df['high'], 9, np.maximum)
+            nine_period_low = _rolling_extreme(df['low'], 9, np.minimum)
+            tenkan_sen = (nine_period_high + nine_period_low) / 2
 
             # Kijun-sen (Base Line)
-            twenty_six_period_high = df['high'].rolling(window=26).max()
-            twenty_six_period_low = df['low'].rolling(window=26).min()
-            df['kijun_sen'] = (twenty_six_period_high + twenty_six_period_low) / 2
+            twenty_six_period_high = _rolling_extreme(df['high'], 26, np.maximum)
+            twenty_six_period_low = _rolling_extreme(df['low'], 26, np.minimum)
+            kijun_sen = (twenty_six_period_high + twenty_six_period_low) / 2
 
             # Senkou Span A (Leading Span A)
-            df['senkou_span_a'] = ((df['tenkan_sen'] + df['kijun_sen']) / 2).shift(26)
+            senkou_span_a = pd.Series((tenkan_sen + kijun_sen) / 2, index=df.index).shift(26)
 
             # Simple cloud signals
-            df['ichimoku_signal'] = np.where(
-                df['close'] > df['senkou_span_a'], 1,
-                np.where(df['close'] < df['senkou_span_a'], -1, 0)
+            close = df['close']
+            ichimoku_signal = np.where(
+                close > senkou_span_a, 1,
+                np.where(close < senkou_span_a, -1, 0)
             )
 
-            return df
+            return {
+                'tenkan_sen': tenkan_sen,
+                'kijun_sen': kijun_sen,
+                'senkou_span_a': senkou_span_a,
+                'ichimoku_signal': ichimoku_signal
+            }
 
         except Exception as e:
             self.logger.error(f"Ошибка расчета Ichimoku: {str(e)}")
-            return df
+            return {}
@@ -1,10 +1,32 @@
+import atexit
 import logging
+import queue
 import sys
 import os
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from colorlog import ColoredFormatter
 
 
+def _attach_queue_listener(logger: logging.Logger, *handlers: logging.Handler) -> QueueListener:
+    """
+    Подключение обработчиков к логгеру через очередь
+
+    Вызывающий поток только кладет запись в очередь, а форматирование и
+    запись в консоль/файлы выполняет фоновый QueueListener.
+    """
+    log_queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+
+    # Храним слушатель на логгере, а при выходе дописываем оставшиеся записи
+    logger._listener = listener
+    atexit.register(listener.stop)
+
+    return listener
+
+
 def setup_logger(name: str = 'AITrader', log_level: str = 'INFO', trading_style: str = 'positional') -> logging.Logger:
     """
     Настройка логгера для проекта
@@ -19,8 +41,7 @@ def setup_logger(name: str = 'AITrader', log_level: str = 'INFO', trading_style:
     """
     # Создаем папку для логов если ее нет
     log_dir = 'logs'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+    os.makedirs(log_dir, exist_ok=True)
 
     # Преобразуем строковый уровень в числовой
     level = getattr(logging, log_level.upper(), logging.INFO)
@@ -85,10 +106,8 @@ def setup_logger(name: str = 'AITrader', log_level: str = 'INFO', trading_style:
     file_handler.setLevel(level)
     file_handler.setFormatter(file_formatter)
 
-    # Добавляем обработчики к логгеру
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    logger.addHandler(full_log_handler)
+    # Обработчики работают в фоновом потоке через очередь
+    _attach_queue_listener(logger, console_handler, file_handler, full_log_handler)
 
     # Предотвращаем распространение на корневой логгер
     logger.propagate = False
@@ -110,8 +129,7 @@ def setup_training_logger(symbol: str, timestamp: str, trading_style: str = 'pos
     """
     # Создаем папку для логов тестов если ее нет
     log_dir = 'Log_tests_sell'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+    os.makedirs(log_dir, exist_ok=True)
 
     # Префикс для стиля торговли
     style_prefix = {
@@ -136,8 +154,8 @@ def setup_training_logger(symbol: str, timestamp: str, trading_style: str = 'pos
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
 
-    # Добавляем обработчик
-    logger.addHandler(file_handler)
+    # Обработчик работает в фоновом потоке через очередь
+    _attach_queue_listener(logger, file_handler)
     logger.propagate = False
 
     return logger, log_file
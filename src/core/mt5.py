@@ -1,15 +1,27 @@
 import MetaTrader5 as mt5
 import logging
+import threading
+import time
 from typing import Optional, Tuple
 
 logger = logging.getLogger('MT5')
 
 
 class MT5:
+    # Период фоновой проверки соединения (секунды); столько же живет ее результат
+    HEARTBEAT_INTERVAL = 10
+
     def __init__(self):
         self.connected = False
         self.logger = logger
 
+        # Результат последней проверки account_info() и момент ее выполнения (time.monotonic)
+        self._heartbeat_lock = threading.Lock()
+        self._last_heartbeat_ok = False
+        self._last_heartbeat_ts = 0.0
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
     def initialize(self, path: str = "", login: int = 0, password: str = "", server: str = "") -> Tuple[bool, str]:
         """
         Инициализирует соединение с MT5
@@ -24,9 +36,9 @@ class MT5:
             Tuple[bool, str]: (Успешность подключения, Сообщение об ошибке)
         """
         try:
-            # Закрываем предыдущее соединение если было
-            if mt5.initialize():
-                mt5.shutdown()
+            # Закрываем предыдущее соединение если было (без пробной инициализации терминала)
+            if self.connected:
+                self.shutdown()
 
             # Пытаемся инициализировать MT5
             if not mt5.initialize(path=path, login=login, password=password, server=server):
@@ -37,6 +49,7 @@ class MT5:
 
             self.connected = True
             self.logger.info("✅ Успешное подключение к MT5")
+            self._start_heartbeat()
 
             # Выводим информацию о подключении
             account_info = mt5.account_info()
@@ -74,29 +87,66 @@ class MT5:
         return error_descriptions.get(error_code, f"Неизвестная ошибка: {error_code}")
 
     def check_connection(self) -> bool:
-        """Проверяет активное соединение с MT5"""
-        try:
-            if not self.connected:
-                return False
+        """
+        Проверяет активное соединение с MT5
 
-            # Пытаемся получить информацию об аккаунте для проверки соединения
-            account_info = mt5.account_info()
-            if account_info is None:
-                self.connected = False
-                self.logger.warning("❌ Соединение с MT5 потеряно")
-                return False
+        Пока результат фоновой проверки свежее HEARTBEAT_INTERVAL, запрос к
+        терминалу не выполняется.
+        """
+        if not self.connected:
+            return False
 
-            self.connected = True
-            return True
+        with self._heartbeat_lock:
+            if time.monotonic() - self._last_heartbeat_ts < self.HEARTBEAT_INTERVAL:
+                return self._last_heartbeat_ok
+
+        return self._probe_connection()
 
+    def _probe_connection(self) -> bool:
+        """Проверка соединения запросом account_info() с сохранением результата"""
+        try:
+            # Пытаемся получить информацию об аккаунте для проверки соединения
+            ok = mt5.account_info() is not None
         except Exception as e:
             self.logger.error(f"Ошибка проверки соединения: {str(e)}")
-            self.connected = False
-            return False
+            ok = False
+        else:
+            if not ok and self.connected:
+                self.logger.warning("❌ Соединение с MT5 потеряно")
+
+        with self._heartbeat_lock:
+            self._last_heartbeat_ok = ok
+            self._last_heartbeat_ts = time.monotonic()
+        self.connected = ok
+        return ok
+
+    def _start_heartbeat(self):
+        """Запуск фоновой проверки соединения"""
+        with self._heartbeat_lock:
+            self._last_heartbeat_ok = True
+            self._last_heartbeat_ts = time.monotonic()
+
+        if self._heartbeat_thread is not None and self._heartbeat_thread.is_alive():
+            return
+
+        self._heartbeat_stop.clear()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='mt5-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self):
+        """Периодическая проверка соединения, пока оно активно"""
+        while not self._heartbeat_stop.wait(self.HEARTBEAT_INTERVAL):
+            if not self.connected or not self._probe_connection():
+                break
 
     def shutdown(self):
         """Закрывает соединение с MT5"""
         try:
+            self._heartbeat_stop.set()
+            heartbeat = self._heartbeat_thread
+            if heartbeat is not None and heartbeat is not threading.current_thread():
+                # Дожидаемся старой проверки, чтобы повторный initialize запустил новую
+                heartbeat.join(timeout=1)
             if self.connected:
                 mt5.shutdown()
                 self.connected = False
@@ -3,30 +3,87 @@
 Модуль для отслеживания рынка в реальном времени
 """
 
+import heapq
 import time
 import threading
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from operator import itemgetter
+from typing import Dict, List, Optional, Callable, Tuple
 import logging
-from .data import DataFetcher
+from .data import DataFetcher, _true_range
 from .mt5 import MT5
 
 
+@dataclass
+class SymbolTick:
+    """Данные символа за одно обновление рынка"""
+    __slots__ = ('symbol', 'base_symbol', 'bid', 'ask', 'spread', 'price_change', 'volume',
+                 'timestamp', 'indicators')
+
+    symbol: str
+    base_symbol: str
+    bid: float
+    ask: float
+    spread: float
+    price_change: float
+    volume: float
+    timestamp: datetime
+    indicators: Dict[str, float]
+
+    def to_dict(self) -> Dict[str, any]:
+        """Представление в виде словаря (прежний формат данных символа)"""
+        return asdict(self)
+
+
 class RealTimeMonitor:
     """Монитор рынка в реальном времени"""
 
+    # Сколько секунд помнить найденное (или ненайденное) имя символа у брокера
+    SYMBOL_CACHE_TTL = 3600
+    # Сколько базовых символов помнить в кэше имен (самые давно использованные вытесняются)
+    SYMBOL_CACHE_SIZE = 256
+
+    # Суффиксы, которые брокеры добавляют к именам символов
+    SYMBOL_SUFFIXES = ('', 'rfd', 'm', 'f', 'q', 'a', 'b', 'c', 'd', 'e')
+
+    # Буфер последних баров M1 по символу: столбцы массива (BAR_COUNT, len(BAR_FIELDS))
+    BAR_FIELDS = ('time', 'open', 'high', 'low', 'close', 'tick_volume')
+    BAR_COUNT = 50
+
     def __init__(self, data_fetcher: DataFetcher):
         self.data_fetcher = data_fetcher
         self.logger = logging.getLogger('RealTimeMonitor')
         self.running = False
         self.thread = None
-        self.subscribers = []
+        # Кортеж подписчиков заменяется целиком при изменении, поэтому рассылка идет без блокировок
+        self.subscribers: Tuple[Callable, ...] = ()
+        self._subscribers_lock = threading.Lock()
         self.symbols = []
         self.symbol_mapping = {}  # Сопоставление базовых символов с полными именами
         self.update_interval = 5  # секунды
         self.stop_event = threading.Event()
+        self._wake_event = threading.Event()  # Внеочередное обновление (wake) или остановка
+        self._pool: Optional[ThreadPoolExecutor] = None  # Потоки для параллельного опроса символов
+        self._dispatch_pool: Optional[ThreadPoolExecutor] = None  # Потоки для вызова подписчиков
+        # Подписчики, вызов которых сейчас выполняется -> отложенное обновление (или None).
+        # Каждый подписчик вызывается строго последовательно: пока идет его вызов, новые
+        # обновления не запускают второй параллельный вызов, а заменяют отложенное
+        self._in_flight: Dict[Callable, Optional[Dict[str, any]]] = {}
+        self._dispatch_lock = threading.Lock()
+        # Блокировка только для записи: чтение словарей под GIL атомарно
+        self._mapping_lock = threading.Lock()
+        # Базовый символ -> (время проверки, имя у брокера или None)
+        self._symbol_resolution_cache: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()
+        # Символ у брокера -> буфер последних баров (дополняется новыми барами, а не загружается заново)
+        self._bars: Dict[str, np.ndarray] = {}
+        # Состав колонок буфера постоянный, поэтому наличие объема проверяем один раз
+        self._has_tick_volume = 'tick_volume' in self.BAR_FIELDS
+        # Суффикс, с которым уже находились символы этого брокера (проверяется первым)
+        self._broker_suffix: Optional[str] = None
 
     def start_monitoring(self, symbols: List[str], update_interval: int = 5):
         """Запуск мониторинга символов"""
@@ -35,10 +92,18 @@ class RealTimeMonitor:
             self.update_interval = update_interval
             self.running = True
             self.stop_event.clear()
+            self._wake_event.clear()
 
             # Инициализируем сопоставление символов
             self._initialize_symbol_mapping(symbols)
 
+            # Пул потоков переиспользуется между обновлениями
+            self._get_pool()
+
+            # Подписчики вызываются отдельно, чтобы медленный обработчик не задерживал опрос рынка
+            if self._dispatch_pool is None:
+                self._dispatch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='rt-dispatch')
+
             self.thread = threading.Thread(target=self._monitoring_loop, daemon=True)
             self.thread.start()
 
@@ -54,52 +119,121 @@ class RealTimeMonitor:
         """Остановка мониторинга"""
         self.running = False
         self.stop_event.set()
+        self._wake_event.set()
 
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=10)
             if self.thread.is_alive():
                 self.logger.warning("⚠️ Поток мониторинга не завершился корректно")
 
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+        if self._dispatch_pool is not None:
+            self._dispatch_pool.shutdown(wait=False, cancel_futures=True)
+            self._dispatch_pool = None
+        with self._dispatch_lock:
+            self._in_flight.clear()
+
         self.logger.info("🛑 Мониторинг остановлен")
 
+    def wake(self):
+        """Запросить обновление рынка, не дожидаясь окончания интервала"""
+        self._wake_event.set()
+
+    def _wait_next_update(self) -> bool:
+        """Ожидание следующего обновления; False, если мониторинг остановлен"""
+        self._wake_event.wait(self.update_interval)
+        self._wake_event.clear()
+        return self.running and not self.stop_event.is_set()
+
     def is_running(self) -> bool:
         """Проверка статуса мониторинга"""
         return self.running and not self.stop_event.is_set()
 
     def _initialize_symbol_mapping(self, symbols: List[str]):
         """Инициализация сопоставления символов с правильными именами"""
-        self.symbol_mapping = {}
+        # Собираем новое сопоставление отдельно и подменяем целиком
+        mapping = {}
 
         for symbol in symbols:
             correct_symbol = self._find_correct_symbol(symbol)
             if correct_symbol:
-                self.symbol_mapping[symbol] = correct_symbol
+                mapping[symbol] = correct_symbol
                 self.logger.info(f"✅ Символ {symbol} -> {correct_symbol}")
             else:
                 self.logger.warning(f"⚠️ Не удалось найти правильный символ для {symbol}")
 
+        with self._mapping_lock:
+            self.symbol_mapping = mapping
+
     def _find_correct_symbol(self, base_symbol: str) -> Optional[str]:
         """
-        Поиск правильного имени символа с учетом суффиксов брокера
+        Поиск правильного имени символа с учетом суффиксов брокера (результат кэшируется)
+        """
+        cached = self._symbol_resolution_cache.get(base_symbol)
+        if cached is not None and time.time() - cached[0] < self.SYMBOL_CACHE_TTL:
+            with self._mapping_lock:
+                if base_symbol in self._symbol_resolution_cache:
+                    self._symbol_resolution_cache.move_to_end(base_symbol)
+            return cached[1]
+
+        correct_symbol = self._probe_symbol(base_symbol)
+        with self._mapping_lock:
+            self._symbol_resolution_cache[base_symbol] = (time.time(), correct_symbol)
+            self._symbol_resolution_cache.move_to_end(base_symbol)
+            while len(self._symbol_resolution_cache) > self.SYMBOL_CACHE_SIZE:
+                self._symbol_resolution_cache.popitem(last=False)
+        return correct_symbol
+
+    def invalidate_symbol_cache(self):
+        """Сброс кэша имен символов (например, после смены счета или брокера)"""
+        with self._mapping_lock:
+            self._symbol_resolution_cache.clear()
+
+    def _probe_symbol(self, base_symbol: str) -> Optional[str]:
         """
-        possible_suffixes = ['', 'rfd', 'm', 'f', 'q', 'a', 'b', 'c', 'd', 'e']
+        Поиск имени символа у брокера
+
+        Кандидаты берутся одним запросом symbols_get по маске *base_symbol*:
+        сначала базовое имя с известными суффиксами, затем остальные похожие.
+        Найденное имя проверяется наличием котировки.
+        """
+        # У одного брокера символы обычно имеют общий суффикс - начинаем с уже найденного
+        suffixes = self.SYMBOL_SUFFIXES
+        if self._broker_suffix is not None:
+            suffixes = (self._broker_suffix,) + tuple(s for s in suffixes if s != self._broker_suffix)
+
+        candidates = self.data_fetcher.find_symbols(base_symbol)
+        names = set(candidates) if candidates else None
 
-        for suffix in possible_suffixes:
+        # Если терминал не ответил или маска ничего не нашла, проверяем суффиксы напрямую
+        for suffix in suffixes:
             test_symbol = base_symbol + suffix
-            if self._check_symbol_exists(test_symbol):
+            if (names is None or test_symbol in names) and self._check_symbol_exists(test_symbol):
+                self._broker_suffix = suffix
                 return test_symbol
 
-        # Если не нашли с суффиксами, попробуем найти похожие символы
-        all_symbols = self.data_fetcher.get_all_symbols()
-        if all_symbols:
-            for symbol in all_symbols:
-                if base_symbol in symbol:
-                    self.logger.info(f"🔍 Найден похожий символ: {symbol} для базового {base_symbol}")
-                    if self._check_symbol_exists(symbol):
-                        return symbol
+        if names is None:
+            return None
+
+        # Если не нашли с суффиксами, проверяем похожие символы
+        for symbol in candidates:
+            if not any(symbol == base_symbol + suffix for suffix in self.SYMBOL_SUFFIXES):
+                self.logger.info(f"🔍 Найден похожий символ: {symbol} для базового {base_symbol}")
+                if self._check_symbol_exists(symbol):
+                    return symbol
 
         return None
 
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Пул потоков для запросов к MT5 (создается при первом обращении)"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=min(32, max(1, len(self.symbols))),
+                                            thread_name_prefix='rt-fetch')
+        return self._pool
+
     def _check_symbol_exists(self, symbol: str) -> bool:
         """Проверка существования символа"""
         try:
@@ -116,14 +250,19 @@ class RealTimeMonitor:
 
     def subscribe(self, callback: Callable):
         """Подписка на обновления рынка"""
-        self.subscribers.append(callback)
+        with self._subscribers_lock:
+            self.subscribers = self.subscribers + (callback,)
         self.logger.info(f"✅ Добавлен подписчик на обновления рынка")
 
     def unsubscribe(self, callback: Callable):
         """Отписка от обновлений"""
-        if callback in self.subscribers:
-            self.subscribers.remove(callback)
-            self.logger.info(f"✅ Удален подписчик обновлений рынка")
+        with self._subscribers_lock:
+            if callback not in self.subscribers:
+                return
+            # Как и list.remove, убираем только первое вхождение
+            index = self.subscribers.index(callback)
+            self.subscribers = self.subscribers[:index] + self.subscribers[index + 1:]
+        self.logger.info(f"✅ Удален подписчик обновлений рынка")
 
     def _monitoring_loop(self):
         """Основной цикл мониторинга"""
@@ -132,89 +271,92 @@ class RealTimeMonitor:
                 market_data = self._get_real_time_data()
 
                 # Уведомляем подписчиков
+                dispatch_pool = self._dispatch_pool
                 for callback in self.subscribers:
-                    try:
-                        callback(market_data)
-                    except Exception as e:
-                        self.logger.error(f"❌ Ошибка в callback подписчика: {e}")
+                    if dispatch_pool is not None:
+                        self._dispatch(dispatch_pool, callback, market_data)
+                    else:
+                        self._safe_call(callback, market_data)
 
-                # Используем stop_event для ожидания с возможностью прерывания
-                self.stop_event.wait(self.update_interval)
+                # Ожидание прерывается остановкой или вызовом wake()
+                if not self._wait_next_update():
+                    break
 
             except Exception as e:
                 self.logger.error(f"❌ Ошибка в цикле мониторинга: {e}")
-                # Используем stop_event для ожидания с возможностью прерывания
-                self.stop_event.wait(self.update_interval)
+                if not self._wait_next_update():
+                    break
+
+    def _dispatch(self, dispatch_pool: ThreadPoolExecutor, callback: Callable, market_data: Dict[str, any]):
+        """
+        Передача обновления подписчику через пул без параллельных вызовов одного подписчика
+
+        Если предыдущий вызов еще выполняется (обработчик дольше update_interval или был wake()),
+        обновление откладывается; из нескольких отложенных выполняется только последнее.
+        Так обработчик с торговлей (например, автоторговля AITrader) не откроет повторный
+        ордер по тому же сигналу из второго одновременного вызова.
+        """
+        with self._dispatch_lock:
+            if callback in self._in_flight:
+                self._in_flight[callback] = market_data
+                return
+            self._in_flight[callback] = None
+        dispatch_pool.submit(self._run_subscriber, callback, market_data)
+
+    def _run_subscriber(self, callback: Callable, market_data: Dict[str, any]):
+        """Вызов подписчика и затем отложенных для него обновлений, по одному"""
+        while True:
+            self._safe_call(callback, market_data)
+            with self._dispatch_lock:
+                market_data = self._in_flight.get(callback)
+                if market_data is None:
+                    self._in_flight.pop(callback, None)
+                    return
+                self._in_flight[callback] = None
+
+    def _safe_call(self, callback: Callable, market_data: Dict[str, any]):
+        """Вызов подписчика с логированием ошибок (исключения из пула иначе потерялись бы)"""
+        try:
+            callback(market_data)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка в callback подписчика: {e}")
 
     def _get_real_time_data(self) -> Dict[str, any]:
         """Получение данных в реальном времени"""
+        # Одна метка времени на все обновление
+        tick_ts = datetime.now()
         market_data = {
-            'timestamp': datetime.now(),
+            'timestamp': tick_ts,
             'symbols': {},
             'market_state': 'UNKNOWN'
         }
 
         try:
-            price_changes = []
-            volumes = []
+            # Для состояния рынка нужна только средняя величина изменения
+            total_change = 0.0
             successful_symbols = 0
 
-            for base_symbol in self.symbols:
-                # Проверяем, не нужно ли остановить мониторинг
-                if not self.running or self.stop_event.is_set():
-                    break
+            # Запросы к MT5 блокирующие, поэтому символы опрашиваются параллельно,
+            # а результаты собираются здесь в исходном порядке
+            symbols = list(self.symbols)
 
-                symbol = self.symbol_mapping.get(base_symbol, base_symbol)
+            # Котировки всех символов одним запросом, история - параллельно по символам
+            prices = self.data_fetcher.get_current_prices_bulk(
+                [self.symbol_mapping.get(base_symbol, base_symbol) for base_symbol in symbols])
+            results = self._get_pool().map(lambda base_symbol: self._fetch_symbol(base_symbol, prices, tick_ts),
+                                           symbols)
 
-                try:
-                    # Получаем текущие цены
-                    current_price = self.data_fetcher.get_current_price(symbol)
-                    if not current_price or current_price.get('bid', 0) == 0:
-                        # Пробуем переинициализировать символ
-                        correct_symbol = self._find_correct_symbol(base_symbol)
-                        if correct_symbol:
-                            self.symbol_mapping[base_symbol] = correct_symbol
-                            symbol = correct_symbol
-                            current_price = self.data_fetcher.get_current_price(symbol)
-
-                        if not current_price or current_price.get('bid', 0) == 0:
-                            self.logger.warning(f"⚠️ Не удалось получить цену для {symbol} (базовый: {base_symbol})")
-                            continue
-
-                    # Получаем исторические данные для анализа
-                    data = self.data_fetcher.get_rates(symbol, 'M1', count=50)
-                    if data is None or data.empty:
-                        self.logger.warning(f"⚠️ Нет исторических данных для {symbol}")
-                        continue
-
-                    # Рассчитываем изменение цены
-                    price_change = self._calculate_price_change(data)
-                    volume = data['tick_volume'].mean() if 'tick_volume' in data.columns else 0
-
-                    symbol_data = {
-                        'symbol': symbol,
-                        'base_symbol': base_symbol,
-                        'bid': current_price.get('bid', 0),
-                        'ask': current_price.get('ask', 0),
-                        'spread': current_price.get('spread', 0),
-                        'price_change': price_change,
-                        'volume': volume,
-                        'timestamp': datetime.now(),
-                        'indicators': self._calculate_realtime_indicators(data)
-                    }
-
-                    market_data['symbols'][base_symbol] = symbol_data
-                    price_changes.append(price_change)
-                    volumes.append(volume)
-                    successful_symbols += 1
-
-                except Exception as e:
-                    self.logger.warning(f"⚠️ Ошибка получения данных для {symbol} (базовый: {base_symbol}): {e}")
+            for base_symbol, symbol_data in zip(symbols, results):
+                if symbol_data is None:
                     continue
 
+                market_data['symbols'][base_symbol] = symbol_data
+                total_change += symbol_data.price_change
+                successful_symbols += 1
+
             # Определяем общее состояние рынка
-            if price_changes and successful_symbols > 0:
-                avg_change = sum(price_changes) / len(price_changes)
+            if successful_symbols > 0:
+                avg_change = total_change / successful_symbols
                 if avg_change > 0.1:
                     market_data['market_state'] = 'BULLISH'
                 elif avg_change < -0.1:
@@ -223,21 +365,124 @@ class RealTimeMonitor:
                     market_data['market_state'] = 'SIDEWAYS'
 
                 market_data['successful_symbols'] = successful_symbols
-                market_data['total_symbols'] = len(self.symbols)
+                market_data['total_symbols'] = len(symbols)
 
         except Exception as e:
             self.logger.error(f"❌ Ошибка получения данных рынка: {e}")
 
         return market_data
 
-    def _calculate_price_change(self, data: pd.DataFrame) -> float:
-        """Расчет изменения цены в процентах"""
+    def _fetch_symbol(self, base_symbol: str, prices: Optional[Dict[str, Dict]] = None,
+                      timestamp: Optional[datetime] = None) -> Optional[SymbolTick]:
+        """
+        Данные одного символа для обновления рынка (выполняется в пуле потоков)
+
+        prices - котировки, заранее полученные пакетом; если символа там нет,
+        цена запрашивается отдельно. timestamp - общая метка времени обновления.
+        """
+        # Проверяем, не нужно ли остановить мониторинг
+        if not self.running or self.stop_event.is_set():
+            return None
+
+        symbol = self.symbol_mapping.get(base_symbol, base_symbol)
+
         try:
-            if len(data) < 2:
+            # Получаем текущие цены
+            current_price = (prices or {}).get(symbol) or self.data_fetcher.get_current_price(symbol)
+            if not current_price or current_price.get('bid', 0) == 0:
+                # Пробуем переинициализировать символ
+                correct_symbol = self._find_correct_symbol(base_symbol)
+                if correct_symbol:
+                    with self._mapping_lock:
+                        self.symbol_mapping[base_symbol] = correct_symbol
+                    symbol = correct_symbol
+                    current_price = self.data_fetcher.get_current_price(symbol)
+
+                if not current_price or current_price.get('bid', 0) == 0:
+                    self.logger.warning(f"⚠️ Не удалось получить цену для {symbol} (базовый: {base_symbol})")
+                    return None
+
+            # Получаем исторические данные для анализа
+            bars = self._update_bars(symbol)
+            if bars is None:
+                self.logger.warning(f"⚠️ Нет исторических данных для {symbol}")
+                return None
+            data = {field: bars[:, i] for i, field in enumerate(self.BAR_FIELDS)}
+
+            # Рассчитываем изменение цены
+            price_change = self._calculate_price_change(data)
+            volume = data['tick_volume'].mean()
+
+            return SymbolTick(
+                symbol=symbol,
+                base_symbol=base_symbol,
+                bid=current_price.get('bid', 0),
+                ask=current_price.get('ask', 0),
+                spread=current_price.get('spread', 0),
+                price_change=price_change,
+                volume=volume,
+                timestamp=timestamp or datetime.now(),
+                indicators=self._calculate_realtime_indicators(data, has_tick_volume=self._has_tick_volume)
+            )
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ Ошибка получения данных для {symbol} (базовый: {base_symbol}): {e}")
+            return None
+
+    def _update_bars(self, symbol: str) -> Optional[np.ndarray]:
+        """
+        Буфер последних BAR_COUNT баров M1 символа
+
+        При первом обращении загружаются все бары, далее запрашиваются только два
+        последних: текущий бар обновляется на месте, новый сдвигает буфер.
+        Если пропущено больше бара, буфер загружается заново.
+        """
+        bars = self._bars.get(symbol)
+        if bars is not None:
+            latest = self._rates_to_bars(
+                self.data_fetcher.get_rates_arrays(symbol, 'M1', count=2, columns=self.BAR_FIELDS))
+            if latest is None:
+                return None
+
+            if latest[0, 0] <= bars[-1, 0]:
+                for row in latest:
+                    if row[0] == bars[-1, 0]:
+                        bars[-1] = row
+                    elif len(bars) > 1 and row[0] == bars[-2, 0]:
+                        bars[-2] = row
+                    elif row[0] > bars[-1, 0]:
+                        bars = np.roll(bars, -1, axis=0)
+                        bars[-1] = row
+                self._bars[symbol] = bars
+                return bars
+
+        bars = self._rates_to_bars(
+            self.data_fetcher.get_rates_arrays(symbol, 'M1', count=self.BAR_COUNT, columns=self.BAR_FIELDS))
+        if bars is None:
+            self._bars.pop(symbol, None)
+            return None
+        self._bars[symbol] = bars
+        return bars
+
+    def _rates_to_bars(self, rates: Optional[Dict[str, np.ndarray]]) -> Optional[np.ndarray]:
+        """Бары из get_rates_arrays в виде массива float64 со столбцами BAR_FIELDS"""
+        if not rates or not len(rates['time']):
+            return None
+
+        bars = np.empty((len(rates['time']), len(self.BAR_FIELDS)))
+        for i, field in enumerate(self.BAR_FIELDS):
+            bars[:, i] = rates[field]
+        return bars
+
+    def _calculate_price_change(self, data) -> float:
+        """Расчет изменения цены в процентах (data - DataFrame или словарь массивов по колонкам)"""
+        try:
+            close = np.asarray(data['close'])
+            if len(close) < 2:
                 return 0.0
 
-            current_close = data['close'].iloc[-1]
-            previous_close = data['close'].iloc[-2]
+            current_close = close[-1]
+            previous_close = close[-2]
 
             change = ((current_close - previous_close) / previous_close) * 100
             return round(change, 4)
@@ -246,35 +491,44 @@ class RealTimeMonitor:
             self.logger.error(f"❌ Ошибка расчета изменения цены: {e}")
             return 0.0
 
-    def _calculate_realtime_indicators(self, data: pd.DataFrame) -> Dict[str, float]:
-        """Расчет индикаторов в реальном времени"""
+    def _calculate_realtime_indicators(self, data, has_tick_volume: Optional[bool] = None) -> Dict[str, float]:
+        """
+        Расчет индикаторов в реальном времени (data - DataFrame или словарь массивов по колонкам)
+
+        has_tick_volume - известно ли заранее наличие колонки tick_volume (иначе проверяется в data)
+        """
         indicators = {}
 
         try:
-            if len(data) < 20:
+            # Нужны только значения на последнем баре, поэтому считаем по хвостам массивов
+            close = np.asarray(data['close'], dtype=np.float64)
+            if len(close) < 20:
                 return indicators
 
-            # RSI
-            delta = data['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            indicators['rsi'] = 100 - (100 / (1 + rs)).iloc[-1]
+            high = np.asarray(data['high'], dtype=np.float64)
+            low = np.asarray(data['low'], dtype=np.float64)
+
+            # RSI (простые средние прироста и падения за 14 баров)
+            delta = np.diff(close[-15:])
+            gain = np.where(delta > 0, delta, 0.0).mean()
+            loss = np.where(delta < 0, -delta, 0.0).mean()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                indicators['rsi'] = 100 - (100 / (1 + gain / loss))
 
             # Простая скользящая средняя
-            indicators['sma_20'] = data['close'].rolling(window=20).mean().iloc[-1]
+            indicators['sma_20'] = close[-20:].mean()
 
-            # Волатильность (ATR)
-            high_low = data['high'] - data['low']
-            high_close = abs(data['high'] - data['close'].shift())
-            low_close = abs(data['low'] - data['close'].shift())
-            true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-            indicators['atr'] = true_range.rolling(window=14).mean().iloc[-1]
+            # Волатильность (ATR): общий расчет True Range по 15 последним барам,
+            # первый из них нужен только как предыдущий close
+            indicators['atr'] = _true_range(high[-15:], low[-15:], close[-15:])[1:].mean()
 
             # Объем
-            if 'tick_volume' in data.columns:
-                indicators['volume_ma'] = data['tick_volume'].rolling(window=20).mean().iloc[-1]
-                indicators['current_volume'] = data['tick_volume'].iloc[-1]
+            if has_tick_volume is None:
+                has_tick_volume = 'tick_volume' in data
+            if has_tick_volume:
+                tick_volume = np.asarray(data['tick_volume'])
+                indicators['volume_ma'] = tick_volume[-20:].mean()
+                indicators['current_volume'] = tick_volume[-1]
 
         except Exception as e:
             self.logger.error(f"❌ Ошибка расчета индикаторов реального времени: {e}")
@@ -297,7 +551,7 @@ class RealTimeMonitor:
         }
 
         for base_symbol, data in market_data['symbols'].items():
-            change = data.get('price_change', 0)
+            change = data.price_change
             if change > 0.2:
                 summary['bullish_count'] += 1
             elif change < -0.2:
@@ -308,20 +562,21 @@ class RealTimeMonitor:
             # Добавляем в топ движущихся
             summary['top_movers'].append({
                 'symbol': base_symbol,
-                'actual_symbol': data.get('symbol', ''),
+                'actual_symbol': data.symbol,
                 'change': change,
-                'current_price': data.get('bid', 0)
+                'abs_change': abs(change),
+                'current_price': data.bid
             })
 
-        # Сортируем по абсолютному изменению
-        summary['top_movers'].sort(key=lambda x: abs(x['change']), reverse=True)
-        summary['top_movers'] = summary['top_movers'][:5]  # Топ 5
+        # Топ 5 по абсолютному изменению (без полной сортировки)
+        summary['top_movers'] = heapq.nlargest(5, summary['top_movers'], key=itemgetter('abs_change'))
 
         return summary
 
     def get_symbol_mapping(self) -> Dict[str, str]:
         """Получение текущего сопоставления символов"""
-        return self.symbol_mapping.copy()
+        with self._mapping_lock:
+            return dict(self.symbol_mapping)
 
     def add_symbol(self, base_symbol: str) -> bool:
         """Добавление нового символа для мониторинга"""
@@ -329,7 +584,8 @@ class RealTimeMonitor:
             self.symbols.append(base_symbol)
             correct_symbol = self._find_correct_symbol(base_symbol)
             if correct_symbol:
-                self.symbol_mapping[base_symbol] = correct_symbol
+                with self._mapping_lock:
+                    self.symbol_mapping[base_symbol] = correct_symbol
                 self.logger.info(f"✅ Добавлен символ {base_symbol} -> {correct_symbol}")
                 return True
             else:
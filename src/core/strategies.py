@@ -5,30 +5,100 @@
 
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Mapping, Optional, Tuple
 import logging
-from dataclasses import dataclass
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from types import MappingProxyType
 
+from .data import _rolling_extreme, _rolling_means, _rsi, _shift
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class StrategyConfig:
-    """Конфигурация стратегии"""
+    """Конфигурация стратегии (неизменяемая: один объект разделяют все экземпляры класса стратегии)"""
     name: str
     description: str
     risk_level: str  # LOW, MEDIUM, HIGH
     required_indicators: List[str]
-    parameters: Dict[str, Any]
+    parameters: Mapping[str, Any]
     confidence_threshold: float = 60.0
     timeframe: str = 'MEDIUM'
 
 
+class _RollingMean:
+    """Скользящее среднее за window значений с обновлением за O(1) (NaN, пока окно не заполнено)"""
+
+    __slots__ = ('window', 'values', 'total', 'updates')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+        # Раз в window обновлений сумма пересчитывается заново, чтобы не копилась ошибка округления
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.total = math.fsum(self.values)
+
+        return self.total / self.window if len(self.values) == self.window else math.nan
+
+
+class _AdjustedEMA:
+    """EMA с обновлением за O(1), совпадающая с ewm(span=span).mean() pandas (adjust=True)"""
+
+    __slots__ = ('decay', 'numerator', 'denominator')
+
+    def __init__(self, span: int):
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def update(self, value: float) -> float:
+        self.numerator = value + self.decay * self.numerator
+        self.denominator = 1 + self.decay * self.denominator
+        return self.numerator / self.denominator
+
+
 class TradingStrategy(ABC):
     """Абстрактный базовый класс для торговых стратегий"""
 
+    # Тип данных OHLC для расчета индикаторов. np.float32 вдвое уменьшает объем
+    # данных в rolling/ewm расчетах, но теряет точность на инструментах с большими
+    # ценами (индексы, криптовалюты), поэтому по умолчанию используется float64.
+    price_dtype = np.float64
+    PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+    # Колонки входных данных, из которых считаются индикаторы; остальные в расчете не участвуют
+    INPUT_COLUMNS = PRICE_COLUMNS + ('tick_volume',)
+
+    # Конфигурация не зависит от экземпляра, поэтому get_config вызывается один раз на класс;
+    # объект общий для всех экземпляров класса и не должен изменяться
+    _config_cache: Dict[type, StrategyConfig] = {}
+
     def __init__(self):
-        self.config = self.get_config()
+        config = TradingStrategy._config_cache.get(type(self))
+        if config is None:
+            # frozen защищает только поля; словарь параметров закрывается от записи отдельно
+            config = self.get_config()
+            config = replace(config, parameters=MappingProxyType(dict(config.parameters)))
+            TradingStrategy._config_cache[type(self)] = config
+        self.config = config
         self.logger = logging.getLogger(self.__class__.__name__)
+        # Состояние онлайн-расчета индикаторов (update_bar)
+        self._online = None
+        # Колонки последнего фрейма generate_signal: (объект data.columns, список имен)
+        self._columns_cache = None
 
     @abstractmethod
     def get_config(self) -> StrategyConfig:
@@ -51,19 +121,45 @@ class TradingStrategy(ABC):
     def risk_level(self):
         return self.config.risk_level
 
-    def calculate_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Расчет всех необходимых индикаторов для стратегии"""
+    def calculate_indicators(self, data: pd.DataFrame, live: bool = False) -> pd.DataFrame:
+        """
+        Расчет всех необходимых индикаторов для стратегии
+
+        live=True - расчет только для сигнала по последнему бару (торговля в реальном времени):
+        стратегия может не строить ряды, которые generate_signal сам считает для последнего бара.
+        """
         try:
-            df = data.copy()
+            # Копируются только колонки, нужные расчету, а не весь (возможно широкий) входной фрейм
+            df = data[[col for col in self.INPUT_COLUMNS if col in data.columns]].copy()
+
+            # Понижение точности цен только на время расчета
+            downcast = self.price_dtype != np.float64
+            if downcast:
+                price_columns = [col for col in self.PRICE_COLUMNS if col in df.columns]
+                df[price_columns] = df[price_columns].astype(self.price_dtype)
+
+            # True Range нужен и ATR, и ADX - считается один раз
+            true_range = self._true_range(df)
 
             # Базовые индикаторы (RSI, SMA, EMA)
-            df = self._calculate_basic_indicators(df)
+            df = self._calculate_basic_indicators(df, true_range)
 
             # Расширенные индикаторы
-            df = self._calculate_advanced_indicators(df)
+            df = self._calculate_advanced_indicators(df, true_range)
 
             # Стратег-специфичные индикаторы
-            df = self._calculate_strategy_indicators(df)
+            df = self._calculate_strategy_indicators(df, live)
+
+            if downcast:
+                # Индикаторы возвращаем в float64, исходные цены - без потерь
+                reduced = df.select_dtypes(include=[self.price_dtype]).columns
+                df[reduced] = df[reduced].astype(np.float64)
+                df[price_columns] = data[price_columns]
+
+            # Прочие колонки входа возвращаются без изменений (рассчитанные индикаторы важнее)
+            extra_columns = [col for col in data.columns if col not in df.columns]
+            if extra_columns:
+                df[extra_columns] = data[extra_columns]
 
             return df
 
@@ -71,111 +167,163 @@ class TradingStrategy(ABC):
             self.logger.error(f"❌ Ошибка расчета индикаторов: {e}")
             return data
 
-    def _calculate_basic_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Расчет базовых индикаторов"""
-        df = data.copy()
+    def calculate_indicators_batch(self, data: Dict[str, Optional[pd.DataFrame]],
+                                   max_workers: int = 4) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Расчет индикаторов сразу по нескольким символам
+
+        Символы независимы, поэтому считаются параллельно в пуле потоков: векторные операции
+        numpy/pandas над массивами отпускают GIL. Пустые входы (None) возвращаются как есть.
+
+        Returns:
+            Словарь символ -> DataFrame с индикаторами, в порядке переданных символов
+        """
+        symbols = [symbol for symbol, frame in data.items() if frame is not None]
+        if not symbols:
+            return dict(data)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+            futures = {symbol: executor.submit(self.calculate_indicators, data[symbol]) for symbol in symbols}
+            return {symbol: futures[symbol].result() if symbol in futures else frame
+                    for symbol, frame in data.items()}
+
+    def _calculate_basic_indicators(self, data: pd.DataFrame,
+                                    true_range: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Расчет базовых индикаторов (колонки добавляются в копию, сделанную в calculate_indicators)"""
+        df = data
 
-        # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
+        # RSI: прирост и падение из одного массива разностей, средние - из префиксных сумм
+        # (первый бар без разницы считается нулевым изменением)
+        df['rsi'] = _rsi(df['close'])
 
-        # SMA
-        df['sma_20'] = df['close'].rolling(window=20).mean()
-        df['sma_50'] = df['close'].rolling(window=50).mean()
+        # SMA (оба окна по одной префиксной сумме)
+        df['sma_20'], df['sma_50'] = _rolling_means(df['close'], (20, 50))
 
-        # EMA
+        # EMA (используются и в MACD расширенных индикаторов)
         df['ema_12'] = df['close'].ewm(span=12).mean()
         df['ema_26'] = df['close'].ewm(span=26).mean()
 
         # Volatility (ATR)
-        high_low = df['high'] - df['low']
-        high_close = abs(df['high'] - df['close'].shift())
-        low_close = abs(df['low'] - df['close'].shift())
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        df['atr'] = true_range.rolling(window=14).mean()
+        if true_range is None:
+            true_range = self._true_range(df)
+        df['atr'], = _rolling_means(true_range, (14,))
 
         # Volume indicators
         if 'tick_volume' in df.columns:
-            df['volume_sma'] = df['tick_volume'].rolling(window=20).mean()
+            df['volume_sma'], = _rolling_means(df['tick_volume'], (20,))
             df['volume_ratio'] = df['tick_volume'] / df['volume_sma']
 
         return df
 
-    def _calculate_advanced_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Расчет расширенных индикаторов"""
-        df = data.copy()
-
-        # MACD
-        exp1 = df['close'].ewm(span=12).mean()
-        exp2 = df['close'].ewm(span=26).mean()
-        df['macd'] = exp1 - exp2
-        df['macd_signal'] = df['macd'].ewm(span=9).mean()
-        df['macd_histogram'] = df['macd'] - df['macd_signal']
-
-        # Bollinger Bands
-        df['bb_middle'] = df['close'].rolling(window=20).mean()
-        bb_std = df['close'].rolling(window=20).std()
-        df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-        df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-        df['bb_width'] = (df['bb_upper'] - df['bb_lower']) / df['bb_middle']
-        df['bb_position'] = (df['close'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'])
-
-        # Stochastic
-        low_14 = df['low'].rolling(window=14).min()
-        high_14 = df['high'].rolling(window=14).max()
-        df['stoch_k'] = 100 * ((df['close'] - low_14) / (high_14 - low_14))
-        df['stoch_d'] = df['stoch_k'].rolling(window=3).mean()
+    def _calculate_advanced_indicators(self, data: pd.DataFrame,
+                                       true_range: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Расчет расширенных индикаторов (готовый True Range можно передать в true_range)"""
+        # Новые колонки собираются в словарь и добавляются одним assign без копии data.
+        # Цены берутся массивами один раз; все, что не требует ewm/std pandas, считается на них
+        out = {}
+        high = data['high'].to_numpy()
+        low = data['low'].to_numpy()
+        close = data['close'].to_numpy()
+
+        # MACD (ema_12/ema_26 уже рассчитаны в базовых индикаторах)
+        macd = data['ema_12'] - data['ema_26']
+        macd_signal = macd.ewm(span=9).mean()
+        out['macd'] = macd
+        out['macd_signal'] = macd_signal
+        out['macd_histogram'] = macd - macd_signal
+
+        # Bollinger Bands (средняя линия совпадает с sma_20); полосы, ширина и позиция
+        # считаются на массивах, без выравнивания индексов pandas на каждой операции
+        bb_middle = data['sma_20'].to_numpy()
+        bb_band = 2 * data['close'].rolling(window=20).std().to_numpy()
+        bb_upper = bb_middle + bb_band
+        bb_lower = bb_middle - bb_band
+        bb_range = bb_upper - bb_lower
+        out['bb_middle'] = bb_middle
+        out['bb_upper'] = bb_upper
+        out['bb_lower'] = bb_lower
+
+        # Stochastic и Williams %R (общие 14-барные экстремумы)
+        low_14 = _rolling_extreme(low, 14, np.minimum)
+        high_14 = _rolling_extreme(high, 14)
+        range_14 = high_14 - low_14
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out['bb_width'] = bb_range / bb_middle
+            out['bb_position'] = (close - bb_lower) / bb_range
+            stoch_k = 100 * ((close - low_14) / range_14)
+            out['williams_r'] = (high_14 - close) / range_14 * -100
+        out['stoch_k'] = stoch_k
+        out['stoch_d'], = _rolling_means(stoch_k, (3,))
 
         # Ichimoku Cloud
-        df['ichi_tenkan'] = (df['high'].rolling(window=9).max() + df['low'].rolling(window=9).min()) / 2
-        df['ichi_kijun'] = (df['high'].rolling(window=26).max() + df['low'].rolling(window=26).min()) / 2
-        df['ichi_senkou_a'] = ((df['ichi_tenkan'] + df['ichi_kijun']) / 2).shift(26)
-        df['ichi_senkou_b'] = ((df['high'].rolling(window=52).max() + df['low'].rolling(window=52).min()) / 2).shift(26)
-
-        # Williams %R
-        df['williams_r'] = (df['high'].rolling(window=14).max() - df['close']) / (
-                    df['high'].rolling(window=14).max() - df['low'].rolling(window=14).min()) * -100
-
-        # CCI (Commodity Channel Index)
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        sma_typical = typical_price.rolling(window=20).mean()
-        mad = typical_price.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean())
-        df['cci'] = (typical_price - sma_typical) / (0.015 * mad)
+        high_26 = _rolling_extreme(high, 26)
+        low_26 = _rolling_extreme(low, 26, np.minimum)
+        # Окно 52 = два соседних окна по 26, поэтому отдельный проход не нужен
+        high_52 = np.maximum(high_26, _shift(high_26, 26))
+        low_52 = np.minimum(low_26, _shift(low_26, 26))
+        ichi_tenkan = (_rolling_extreme(high, 9) + _rolling_extreme(low, 9, np.minimum)) / 2
+        ichi_kijun = (high_26 + low_26) / 2
+        out['ichi_tenkan'] = ichi_tenkan
+        out['ichi_kijun'] = ichi_kijun
+        out['ichi_senkou_a'] = _shift((ichi_tenkan + ichi_kijun) / 2, 26)
+        out['ichi_senkou_b'] = _shift((high_52 + low_52) / 2, 26)
+
+        # CCI (Commodity Channel Index): среднее и среднее абсолютное отклонение
+        # сразу по всем 20-барным окнам, без Python-вызова на каждое окно
+        typical_price = ((high + low + close) / 3).astype(np.float64, copy=False)
+        sma_typical = np.full(len(typical_price), np.nan)
+        mad = np.full(len(typical_price), np.nan)
+        if len(typical_price) >= 20:
+            windows = sliding_window_view(typical_price, 20)
+            window_mean = windows.mean(axis=1)
+            sma_typical[19:] = window_mean
+            mad[19:] = np.abs(windows - window_mean[:, None]).mean(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out['cci'] = (typical_price - sma_typical) / (0.015 * mad)
 
         # ADX (Average Directional Index)
-        df['adx'] = self._calculate_adx(df)
+        out['adx'] = self._calculate_adx(data, true_range=true_range)
+
+        df = data.assign(**out)
 
         # Parabolic SAR
         df = self._calculate_parabolic_sar(df)
 
         return df
 
-    def _calculate_adx(self, data: pd.DataFrame, period: int = 14) -> pd.Series:
-        """Расчет ADX"""
+    @staticmethod
+    def _true_range(data: pd.DataFrame) -> np.ndarray:
+        """True Range на массивах; на первом баре (без предыдущего close) - high - low"""
+        high = data['high'].to_numpy()
+        low = data['low'].to_numpy()
+        prev_close = _shift(data['close'], 1)
+        # fmax пропускает NaN, как max(axis=1) по трем колонкам
+        return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+    def _calculate_adx(self, data: pd.DataFrame, period: int = 14,
+                       true_range: Optional[np.ndarray] = None) -> pd.Series:
+        """Расчет ADX (готовый True Range можно передать в true_range)"""
         try:
-            high = data['high']
-            low = data['low']
-            close = data['close']
+            high = data['high'].to_numpy(dtype=np.float64)
+            low = data['low'].to_numpy(dtype=np.float64)
 
-            # +DM и -DM
-            up_move = high.diff()
-            down_move = low.diff().abs() * -1
+            # +DM и -DM (падение - предыдущий минимум минус текущий).
+            # up > down и up > 0 - это одно сравнение up > max(down, 0), без масок и их &
+            up_move = high - _shift(high, 1)
+            down_move = _shift(low, 1) - low
 
-            plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0)
-            minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0)
+            plus_dm = np.where(up_move > np.maximum(down_move, 0.0), up_move, 0.0)
+            minus_dm = np.where(down_move > np.maximum(up_move, 0.0), down_move, 0.0)
 
             # True Range
-            tr1 = high - low
-            tr2 = abs(high - close.shift())
-            tr3 = abs(low - close.shift())
-            tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+            tr = true_range if true_range is not None else self._true_range(data)
 
-            # Сглаженные значения
-            plus_di = 100 * (pd.Series(plus_dm).ewm(alpha=1 / period).mean() / tr.ewm(alpha=1 / period).mean())
-            minus_di = 100 * (pd.Series(minus_dm).ewm(alpha=1 / period).mean() / tr.ewm(alpha=1 / period).mean())
+            # Сглаживание +DM, -DM и TR одним проходом ewm по трем колонкам с общим индексом
+            smoothed = pd.DataFrame({'plus_dm': plus_dm, 'minus_dm': minus_dm, 'tr': tr},
+                                    index=data.index).ewm(alpha=1 / period).mean()
+            plus_di = 100 * smoothed['plus_dm'] / smoothed['tr']
+            minus_di = 100 * smoothed['minus_dm'] / smoothed['tr']
 
             # DX и ADX
             dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
@@ -191,66 +339,81 @@ class TradingStrategy(ABC):
                                  af_increment: float = 0.02, af_max: float = 0.2) -> pd.DataFrame:
         """Расчет Parabolic SAR"""
         try:
-            high = df['high'].values
-            low = df['low'].values
-            close = df['close'].values
+            # Цикл скалярный, поэтому работаем с float из списков, а не с элементами numpy;
+            # из состояния нужны только последние ep и af
+            high = df['high'].tolist()
+            low = df['low'].tolist()
+            close = df['close'].tolist()
 
-            psar = np.zeros(len(close))
-            trend = np.zeros(len(close))
-            ep = np.zeros(len(close))
-            af = np.zeros(len(close))
+            psar = [0.0] * len(close)
+            trend = [0.0] * len(close)
 
             # Инициализация
             psar[0] = close[0]
-            trend[0] = 1  # 1 = восходящий тренд, -1 = нисходящий
-            ep[0] = high[0] if trend[0] == 1 else low[0]
-            af[0] = af_start
+            trend[0] = 1.0  # 1 = восходящий тренд, -1 = нисходящий
+            uptrend = True
+            ep = high[0]
+            af = af_start
 
             for i in range(1, len(close)):
                 # Обновление PSAR
-                psar[i] = psar[i - 1] + af[i - 1] * (ep[i - 1] - psar[i - 1])
+                sar = psar[i - 1] + af * (ep - psar[i - 1])
 
                 # Проверка смены тренда
-                if trend[i - 1] == 1:
-                    if low[i] < psar[i]:
-                        trend[i] = -1
-                        psar[i] = max(high[i - 1], high[i])
-                        ep[i] = low[i]
-                        af[i] = af_start
-                    else:
-                        trend[i] = 1
-                        if high[i] > ep[i - 1]:
-                            ep[i] = high[i]
-                            af[i] = min(af[i - 1] + af_increment, af_max)
-                        else:
-                            ep[i] = ep[i - 1]
-                            af[i] = af[i - 1]
+                if uptrend:
+                    if low[i] < sar:
+                        uptrend = False
+                        sar = high[i] if high[i] > high[i - 1] else high[i - 1]
+                        ep = low[i]
+                        af = af_start
+                    elif high[i] > ep:
+                        ep = high[i]
+                        af = min(af + af_increment, af_max)
                 else:
-                    if high[i] > psar[i]:
-                        trend[i] = 1
-                        psar[i] = min(low[i - 1], low[i])
-                        ep[i] = high[i]
-                        af[i] = af_start
-                    else:
-                        trend[i] = -1
-                        if low[i] < ep[i - 1]:
-                            ep[i] = low[i]
-                            af[i] = min(af[i - 1] + af_increment, af_max)
-                        else:
-                            ep[i] = ep[i - 1]
-                            af[i] = af[i - 1]
-
-            df['psar'] = psar
-            df['psar_trend'] = trend
+                    if high[i] > sar:
+                        uptrend = True
+                        sar = low[i] if low[i] < low[i - 1] else low[i - 1]
+                        ep = high[i]
+                        af = af_start
+                    elif low[i] < ep:
+                        ep = low[i]
+                        af = min(af + af_increment, af_max)
+
+                psar[i] = sar
+                trend[i] = 1.0 if uptrend else -1.0
+
+            df['psar'] = np.array(psar)
+            df['psar_trend'] = np.array(trend)
             return df
 
         except Exception as e:
             self.logger.error(f"❌ Ошибка расчета Parabolic SAR: {e}")
             return df
 
+    def _last_rows(self, data: pd.DataFrame, count: int = 2) -> List[Dict[str, Any]]:
+        """
+        Последние count баров как словари обычных значений, от старого к новому.
+
+        Строки переводятся в списки одним to_numpy по срезу, поэтому дальнейшие обращения
+        latest['rsi'] / latest.get(...) - поиск в dict, а не в Series с разбором меток.
+        Список имен колонок запоминается, пока приходит фрейм с тем же объектом колонок
+        (Index неизменяем, новая колонка дает новый объект, и кэш обновляется).
+        """
+        cached = self._columns_cache
+        if cached is not None and cached[0] is data.columns:
+            columns = cached[1]
+        else:
+            columns = data.columns.tolist()
+            self._columns_cache = (data.columns, columns)
+        return [dict(zip(columns, row)) for row in data.iloc[-count:].to_numpy().tolist()]
+
     @abstractmethod
-    def _calculate_strategy_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Расчет специфичных для стратегии индикаторов"""
+    def _calculate_strategy_indicators(self, data: pd.DataFrame, live: bool = False) -> pd.DataFrame:
+        """Расчет специфичных для стратегии индикаторов.
+
+        Получает рабочий фрейм calculate_indicators и дописывает колонки в него без копии.
+        live - флаг calculate_indicators (расчет только для сигнала по последнему бару).
+        """
         pass
 
     @abstractmethod
@@ -258,6 +421,88 @@ class TradingStrategy(ABC):
         """Генерация торгового сигнала"""
         pass
 
+    def reset_online_state(self):
+        """Сброс состояния онлайн-расчета (например, при смене символа или таймфрейма)"""
+        self._online = None
+
+    def update_bar(self, bar: Dict[str, float]) -> Dict[str, float]:
+        """
+        Онлайн-обновление базовых индикаторов по одному новому закрытому бару за O(1).
+
+        В живой торговле вместо пересчета calculate_indicators по всей истории на каждом баре
+        бары подаются сюда по порядку (словарь с high/low/close и, при наличии, tick_volume).
+        Значения rsi, sma_20, sma_50, ema_12, ema_26, atr, volume_sma, volume_ratio и MACD
+        совпадают с последней строкой calculate_indicators по той же истории.
+        """
+        state = self._online
+        if state is None:
+            state = self._online = {
+                'prev_close': None,
+                'gain': _RollingMean(14), 'loss': _RollingMean(14),
+                'sma_20': _RollingMean(20), 'sma_50': _RollingMean(50),
+                'ema_12': _AdjustedEMA(12), 'ema_26': _AdjustedEMA(26), 'macd_signal': _AdjustedEMA(9),
+                'atr': _RollingMean(14), 'volume_sma': _RollingMean(20),
+            }
+
+        high = float(bar['high'])
+        low = float(bar['low'])
+        close = float(bar['close'])
+        prev_close = state['prev_close']
+        state['prev_close'] = close
+
+        # RSI: первый бар без предыдущего close считается нулевым изменением
+        delta = close - prev_close if prev_close is not None else 0.0
+        avg_gain = state['gain'].update(delta if delta > 0 else 0.0)
+        avg_loss = state['loss'].update(-delta if delta < 0 else 0.0)
+        if avg_loss > 0:
+            rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+        elif avg_loss == 0 and avg_gain > 0:
+            rsi = 100.0
+        else:
+            rsi = math.nan
+
+        # True Range: на первом баре - high - low
+        true_range = high - low
+        if prev_close is not None:
+            true_range = max(true_range, abs(high - prev_close), abs(low - prev_close))
+
+        ema_12 = state['ema_12'].update(close)
+        ema_26 = state['ema_26'].update(close)
+        macd = ema_12 - ema_26
+        macd_signal = state['macd_signal'].update(macd)
+
+        values = {
+            'rsi': rsi,
+            'sma_20': state['sma_20'].update(close),
+            'sma_50': state['sma_50'].update(close),
+            'ema_12': ema_12,
+            'ema_26': ema_26,
+            'atr': state['atr'].update(true_range),
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_histogram': macd - macd_signal,
+        }
+
+        if 'tick_volume' in bar:
+            volume = float(bar['tick_volume'])
+            volume_sma = state['volume_sma'].update(volume)
+            values['volume_sma'] = volume_sma
+            # Нулевое среднее бывает только при нулевых объемах во всем окне - как 0/0 в pandas
+            values['volume_ratio'] = volume / volume_sma if volume_sma else math.nan
+
+        return values
+
+    def generate_signals_batch(self, data: Dict[str, Optional[pd.DataFrame]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Сигналы сразу по нескольким символам (символ -> DataFrame с индикаторами)
+
+        Returns:
+            Словарь символ -> сигнал в формате generate_signal, в порядке переданных символов
+        """
+        return {symbol: self.generate_signal(frame) if frame is not None else
+                {'signal': 'HOLD', 'strength': 0, 'description': 'Недостаточно данных'}
+                for symbol, frame in data.items()}
+
     def get_prediction_parameters(self) -> Dict[str, Any]:
         """Возвращает параметры для предсказаний"""
         return {
@@ -288,9 +533,9 @@ class SimpleMAStrategy(TradingStrategy):
             timeframe='MEDIUM'
         )
 
-    def _calculate_strategy_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_strategy_indicators(self, data: pd.DataFrame, live: bool = False) -> pd.DataFrame:
         """Расчет специфичных индикаторов для MA стратегии"""
-        df = data.copy()
+        df = data
 
         # Разность между MA
         df['ma_diff'] = df['sma_20'] - df['sma_50']
@@ -300,8 +545,8 @@ class SimpleMAStrategy(TradingStrategy):
         df['momentum'] = df['close'] - df['close'].shift(5)
 
         # Price Channel
-        df['price_channel_high'] = df['high'].rolling(window=20).max()
-        df['price_channel_low'] = df['low'].rolling(window=20).min()
+        df['price_channel_high'] = _rolling_extreme(df['high'], 20)
+        df['price_channel_low'] = _rolling_extreme(df['low'], 20, np.minimum)
         df['price_channel_middle'] = (df['price_channel_high'] + df['price_channel_low']) / 2
 
         return df
@@ -312,8 +557,7 @@ class SimpleMAStrategy(TradingStrategy):
             if len(data) < 50:
                 return {'signal': 'HOLD', 'strength': 0, 'description': 'Недостаточно данных'}
 
-            latest = data.iloc[-1]
-            previous = data.iloc[-2]
+            previous, latest = self._last_rows(data)
 
             # Базовые условия MA
             ma_bullish = (latest['sma_20'] > latest['sma_50'] and
@@ -398,25 +642,27 @@ class RSIStrategy(TradingStrategy):
             timeframe='SHORT'
         )
 
-    def _calculate_strategy_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_strategy_indicators(self, data: pd.DataFrame, live: bool = False) -> pd.DataFrame:
         """Расчет специфичных индикаторов для RSI стратегии"""
-        df = data.copy()
+        df = data
 
         # RSI производные
         df['rsi_sma'] = df['rsi'].rolling(window=10).mean()
         df['rsi_trend'] = df['rsi'] - df['rsi_sma']
 
-        # Множественные RSI периоды
-        for period in [7, 21]:
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-            rs = gain / loss
-            df[f'rsi_{period}'] = 100 - (100 / (1 + rs))
+        # Множественные RSI периоды: разности, прирост и падение считаются один раз,
+        # средние для всех периодов - по одной префиксной сумме
+        periods = (7, 21)
+        delta = df['close'].diff().to_numpy()
+        avg_gains = _rolling_means(np.where(delta > 0, delta, 0.0), periods)
+        avg_losses = _rolling_means(np.where(delta < 0, -delta, 0.0), periods)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for period, avg_gain, avg_loss in zip(periods, avg_gains, avg_losses):
+                df[f'rsi_{period}'] = 100 - (100 / (1 + avg_gain / avg_loss))
 
         # RSI дивергенция (упрощенная)
-        df['price_high_5'] = df['high'].rolling(window=5).max()
-        df['rsi_high_5'] = df['rsi'].rolling(window=5).max()
+        df['price_high_5'] = _rolling_extreme(df['high'], 5)
+        df['rsi_high_5'] = _rolling_extreme(df['rsi'], 5)
 
         return df
 
@@ -426,8 +672,7 @@ class RSIStrategy(TradingStrategy):
             if len(data) < 30:
                 return {'signal': 'HOLD', 'strength': 0, 'description': 'Недостаточно данных'}
 
-            latest = data.iloc[-1]
-            previous = data.iloc[-2]
+            previous, latest = self._last_rows(data)
 
             # Базовые RSI условия
             rsi_oversold = latest['rsi'] < 30
@@ -540,9 +785,9 @@ class MACDStrategy(TradingStrategy):
             timeframe='MEDIUM'
         )
 
-    def _calculate_strategy_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_strategy_indicators(self, data: pd.DataFrame, live: bool = False) -> pd.DataFrame:
         """Расчет специфичных индикаторов для MACD стратегии"""
-        df = data.copy()
+        df = data
 
         # Производные MACD
         df['macd_trend'] = df['macd'] - df['macd_signal']
@@ -557,24 +802,28 @@ class MACDStrategy(TradingStrategy):
             df[f'macd_signal_{fast}_{slow}'] = df[f'macd_{fast}_{slow}'].ewm(span=9).mean()
 
         # MACD дивергенция (упрощенная)
-        df['price_extremes'] = df['close'].rolling(window=10).apply(
-            lambda x: 1 if x.iloc[-1] == x.max() else (-1 if x.iloc[-1] == x.min() else 0)
-        )
-        df['macd_extremes'] = df['macd'].rolling(window=10).apply(
-            lambda x: 1 if x.iloc[-1] == x.max() else (-1 if x.iloc[-1] == x.min() else 0)
-        )
+        df['price_extremes'] = self._rolling_extremes(df['close'])
+        df['macd_extremes'] = self._rolling_extremes(df['macd'])
 
         return df
 
+    @staticmethod
+    def _rolling_extremes(series: pd.Series, window: int = 10) -> np.ndarray:
+        """1 - бар на максимуме своего окна, -1 - на минимуме, 0 - иначе (NaN до заполнения окна)"""
+        values = series.to_numpy(dtype=np.float64)
+        window_max = _rolling_extreme(values, window)
+        window_min = _rolling_extreme(values, window, np.minimum)
+        extremes = np.where(values == window_max, 1.0, np.where(values == window_min, -1.0, 0.0))
+        extremes[np.isnan(window_max)] = np.nan
+        return extremes
+
     def generate_signal(self, data: pd.DataFrame) -> Dict[str, Any]:
         """Генерация сигнала с улучшенной MACD логикой"""
         try:
             if len(data) < 35:
                 return {'signal': 'HOLD', 'strength': 0, 'description': 'Недостаточно данных'}
 
-            latest = data.iloc[-1]
-            previous = data.iloc[-2]
-            second_previous = data.iloc[-3] if len(data) > 2 else previous
+            second_previous, previous, latest = self._last_rows(data, 3)
 
             # Базовые MACD условия
             macd_bullish_cross = (previous['macd'] <= previous['macd_signal'] and
@@ -688,9 +937,9 @@ class BollingerBandsStrategy(TradingStrategy):
             timeframe='SHORT'
         )
 
-    def _calculate_strategy_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_strategy_indicators(self, data: pd.DataFrame, live: bool = False) -> pd.DataFrame:
         """Расчет специфичных индикаторов для Bollinger Bands стратегии"""
-        df = data.copy()
+        df = data
 
         # Percent B индикатор (ИСПРАВЛЕННАЯ СТРОКА - убран символ % в начале)
         df['percent_b'] = (df['close'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'])
@@ -716,8 +965,7 @@ class BollingerBandsStrategy(TradingStrategy):
             if len(data) < 50:
                 return {'signal': 'HOLD', 'strength': 0, 'description': 'Недостаточно данных'}
 
-            latest = data.iloc[-1]
-            previous = data.iloc[-2]
+            previous, latest = self._last_rows(data)
 
             # Базовые условия BB
             below_lower_band = latest['close'] < latest['bb_lower']
@@ -801,6 +1049,21 @@ class BollingerBandsStrategy(TradingStrategy):
 class AdvancedMultiStrategy(TradingStrategy):
     """Комплексная мульти-стратегия с улучшенными индикаторами"""
 
+    # Колонки последнего бара, обязательные для пакетной оценки компонентов
+    SCORE_COLUMNS = ('rsi', 'macd', 'macd_signal', 'close', 'bb_lower', 'bb_upper', 'bb_position',
+                     'stoch_k', 'stoch_d', 'trend_composite', 'adx', 'psar_trend')
+    # Компоненты скора (ключи оценок generate_signal и _score_components)
+    COMPONENTS = ('rsi', 'macd', 'bb', 'stoch', 'trend', 'volume', 'volatility')
+
+    def __init__(self):
+        super().__init__()
+        # Веса компонентов (имя без префикса weight_, вес) в порядке параметров конфигурации:
+        # разбор имен параметров выполняется один раз, а не при каждом сигнале
+        self._active_weights: List[Tuple[str, float]] = [
+            (key[7:], weight) for key, weight in self.config.parameters.items()
+            if key.startswith('weight_') and key[7:] in self.COMPONENTS
+        ]
+
     def get_config(self) -> StrategyConfig:
         return StrategyConfig(
             name="Продвинутая мульти-стратегия",
@@ -821,28 +1084,15 @@ class AdvancedMultiStrategy(TradingStrategy):
             timeframe='LONG'
         )
 
-    def _calculate_strategy_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_strategy_indicators(self, data: pd.DataFrame, live: bool = False) -> pd.DataFrame:
         """Расчет расширенных индикаторов для комплексной стратегии"""
-        df = data.copy()
+        df = data
 
-        # Композитный индикатор тренда
-        df['trend_composite'] = (
-                (df['close'] > df['sma_20']).astype(int) +
-                (df['sma_20'] > df['sma_50']).astype(int) +
-                (df['macd'] > df['macd_signal']).astype(int) +
-                (df['adx'] > 25).astype(int)
-        )
-
-        # Индикатор волатильности
-        df['volatility_index'] = df['atr'] / df['close'] * 100
-
-        # Индикатор момента
-        df['momentum_oscillator'] = (
-                                            (df['rsi'] - 50) / 50 +
-                                            (df['stoch_k'] - 50) / 50 +
-                                            (df['cci'] / 100) +
-                                            (df['williams_r'] / -100)
-                                    ) / 4
+        # Композиты по всему ряду нужны фрейму для анализа и бэктеста; при live-расчете
+        # generate_signal считает trend_composite и volatility_index только для последнего
+        # бара (_latest_features), а momentum_oscillator сигналом не читается
+        if not live:
+            self._calculate_composites(df)
 
         # Volume-based indicators
         if 'tick_volume' in df.columns:
@@ -850,53 +1100,262 @@ class AdvancedMultiStrategy(TradingStrategy):
             df['volume_adi'] = self._calculate_adi(df)
 
         # Support/Resistance levels
-        df['resistance'] = df['high'].rolling(window=20).max()
-        df['support'] = df['low'].rolling(window=20).min()
+        df['resistance'] = _rolling_extreme(df['high'], 20)
+        df['support'] = _rolling_extreme(df['low'], 20, np.minimum)
 
         return df
 
+    @staticmethod
+    def _calculate_composites(df: pd.DataFrame):
+        """Композиты по всему ряду: тренд, волатильность и момент"""
+        # Входы композитов берутся массивами один раз; все композиты - выражения numpy
+        # без промежуточных Series и выравнивания индексов
+        close = df['close'].to_numpy()
+        sma_20 = df['sma_20'].to_numpy()
+
+        # Композитный индикатор тренда (сравнение с NaN дает 0, как и раньше)
+        df['trend_composite'] = (
+                (close > sma_20).astype(np.int64) +
+                (sma_20 > df['sma_50'].to_numpy()) +
+                (df['macd'].to_numpy() > df['macd_signal'].to_numpy()) +
+                (df['adx'].to_numpy() > 25)
+        )
+
+        # Индикатор волатильности
+        df['volatility_index'] = df['atr'].to_numpy() / close * 100
+
+        # Индикатор момента
+        df['momentum_oscillator'] = (
+                                            (df['rsi'].to_numpy() - 50) / 50 +
+                                            (df['stoch_k'].to_numpy() - 50) / 50 +
+                                            (df['cci'].to_numpy() / 100) +
+                                            (df['williams_r'].to_numpy() / -100)
+                                    ) / 4
+
+    @staticmethod
+    def _latest_features(latest: Dict[str, Any]):
+        """
+        Композиты стратегии только для последнего бара, если во фрейме нет их колонок
+
+        generate_signal читает trend_composite и volatility_index лишь у последнего бара, поэтому
+        для фрейма без этих колонок (live-расчет calculate_indicators или фрейм после
+        calculate_technical_indicators) они считаются по скалярам строки по тем же формулам,
+        без прохода по всему ряду. Без нужных входов возникает KeyError.
+        """
+        if 'trend_composite' not in latest:
+            # Сравнение с NaN дает False, как и в векторной версии
+            latest['trend_composite'] = (
+                    (latest['close'] > latest['sma_20']) +
+                    (latest['sma_20'] > latest['sma_50']) +
+                    (latest['macd'] > latest['macd_signal']) +
+                    (latest['adx'] > 25)
+            )
+        if 'volatility_index' not in latest and 'atr' in latest:
+            close = latest['close']
+            latest['volatility_index'] = latest['atr'] / close * 100 if close else math.nan
+
     def _calculate_adi(self, data: pd.DataFrame) -> pd.Series:
         """Расчет Accumulation/Distribution Index"""
         try:
-            clv = ((data['close'] - data['low']) - (data['high'] - data['close'])) / (data['high'] - data['low'])
-            clv = clv.fillna(0)
-            adi = (clv * data['tick_volume']).cumsum()
-            return adi
-        except:
+            high = data['high'].to_numpy(dtype=np.float64)
+            low = data['low'].to_numpy(dtype=np.float64)
+            close = data['close'].to_numpy(dtype=np.float64)
+
+            # CLV на массивах; бар с нулевым диапазоном (0/0) дает 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                clv = ((close - low) - (high - close)) / (high - low)
+            clv[np.isnan(clv)] = 0.0
+
+            return pd.Series(np.cumsum(clv * data['tick_volume'].to_numpy(dtype=np.float64)), index=data.index)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка расчета ADI: {e}")
             return pd.Series([0] * len(data), index=data.index)
 
+    @staticmethod
+    def _score_components(latest: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """
+        Оценки компонентов (от -1 до +1) без ветвлений: каждая лестница условий - один np.select.
+
+        Значения в latest/previous - массивы одной длины (по элементу на символ или бар), правила
+        те же, что в лестницах generate_signal. Для одной строки лестницы на обычных float
+        быстрее: у каждого np.select постоянные накладные расходы в десятки микросекунд.
+        """
+        def column(row, name, default=None):
+            return np.asarray(row[name] if default is None else row.get(name, default), dtype=np.float64)
+
+        rsi = column(latest, 'rsi')
+        macd, macd_signal = column(latest, 'macd'), column(latest, 'macd_signal')
+        prev_macd, prev_macd_signal = column(previous, 'macd'), column(previous, 'macd_signal')
+        close = column(latest, 'close')
+        bb_position = column(latest, 'bb_position')
+        stoch_k, stoch_d = column(latest, 'stoch_k'), column(latest, 'stoch_d')
+        trend_composite = column(latest, 'trend_composite')
+        volume_ratio = column(latest, 'volume_ratio', 1)
+        volatility = column(latest, 'volatility_index', 1)
+
+        scores = {}
+
+        # 1. RSI: перепроданность/перекупленность, в зоне 40-60 - слабый сигнал по стороне от 50
+        rsi_neutral = (rsi > 40) & (rsi < 60)
+        scores['rsi'] = np.select([rsi < 30, rsi > 70, rsi_neutral & (rsi > 50), rsi_neutral],
+                                  [1.0, -1.0, 0.5, -0.5], 0.0)
+
+        # 2. MACD: пересечения сильнее, чем положение относительно сигнальной линии
+        macd_above = macd > macd_signal
+        scores['macd'] = np.select([macd_above & (prev_macd <= prev_macd_signal),
+                                    (macd < macd_signal) & (prev_macd >= prev_macd_signal),
+                                    macd_above],
+                                   [1.0, -1.0, 0.5], -0.5)
+
+        # 3. Bollinger Bands: выход за полосы, затем близость к ним
+        scores['bb'] = np.select([close < column(latest, 'bb_lower'), close > column(latest, 'bb_upper'),
+                                  bb_position < 0.3, bb_position > 0.7],
+                                 [1.0, -1.0, 0.5, -0.5], 0.0)
+
+        # 4. Stochastic
+        scores['stoch'] = np.select([(stoch_k < 20) & (stoch_d < 20), (stoch_k > 80) & (stoch_d > 80),
+                                     stoch_k > stoch_d],
+                                    [1.0, -1.0, 0.3], -0.3)
+
+        # 5. Тренд: композит, при неясном композите - сильный тренд по ADX в сторону PSAR
+        scores['trend'] = np.select([trend_composite >= 3, trend_composite <= 1, column(latest, 'adx') > 25],
+                                    [1.0, -1.0, np.where(column(latest, 'psar_trend') > 0, 0.5, -0.5)], 0.0)
+
+        # 6. Volume: высокий объем усиливает сторону тренда
+        trend_side = np.where(scores['trend'] > 0, 1.0, -1.0)
+        scores['volume'] = np.select([volume_ratio > 1.5, volume_ratio > 1.2], [trend_side, 0.5 * trend_side], 0.0)
+
+        # 7. Волатильность: низкая - осторожный сигнал, высокая - риск
+        scores['volatility'] = np.select([volatility < 0.5, volatility > 2.0], [0.3, -0.5], 0.0)
+
+        return scores
+
+    def generate_signals_batch(self, data: Dict[str, Optional[pd.DataFrame]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Сигналы сразу по нескольким символам
+
+        Последние бары всех символов складываются в массивы (по элементу на символ), и оценки
+        компонентов считаются одним проходом _score_components вместо цикла по символам.
+        Символы без нужных колонок считаются обычным generate_signal.
+        """
+        results = {}
+        rows = {}
+        for symbol, frame in data.items():
+            if frame is None or len(frame) < 50:
+                results[symbol] = {'signal': 'HOLD', 'strength': 0, 'description': 'Недостаточно данных'}
+                continue
+            results[symbol] = None
+            try:
+                previous, latest = self._last_rows(frame)
+                self._latest_features(latest)
+            except Exception:
+                # Нет входов композитов (например, фрейм без индикаторов после ошибки расчета):
+                # символ разбирается обычным generate_signal со своей обработкой ошибок
+                results[symbol] = self.generate_signal(frame)
+                continue
+            if all(column in latest for column in self.SCORE_COLUMNS) and \
+                    'macd' in previous and 'macd_signal' in previous:
+                rows[symbol] = (previous, latest)
+            else:
+                results[symbol] = self.generate_signal(frame)
+
+        if rows:
+            try:
+                latest = {column: np.array([row[1].get(column, 1) for row in rows.values()], dtype=np.float64)
+                          for column in self.SCORE_COLUMNS + ('volume_ratio', 'volatility_index')}
+                previous = {column: np.array([row[0][column] for row in rows.values()], dtype=np.float64)
+                            for column in ('macd', 'macd_signal')}
+                scores = self._score_components(latest, previous)
+
+                # Взвешенная сумма по всем символам сразу; слагаемые складываются по одному
+                # в том же порядке, что и в generate_signal, чтобы округление совпадало
+                total_scores = np.zeros(len(rows))
+                for name, weight in self._active_weights:
+                    total_scores += scores[name] * weight
+
+                for index, symbol in enumerate(rows):
+                    components = {name: float(score[index]) for name, score in scores.items()}
+                    results[symbol] = self._signal_from_score(float(total_scores[index]), components)
+
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка пакетной генерации сигналов Advanced: {e}")
+                for symbol in rows:
+                    results[symbol] = self.generate_signal(data[symbol])
+
+        return results
+
+    @staticmethod
+    def _signal_from_score(total_score: float, components: Dict[str, float]) -> Dict[str, Any]:
+        """Торговый сигнал по общему скору и оценкам компонентов"""
+        # Конвертация скора в сигнал
+        if total_score > 0.3:
+            signal = 'BUY'
+            strength = min(int((total_score - 0.3) / 0.7 * 100), 95)
+            description = "Сильный бычий консенсус индикаторов"
+        elif total_score < -0.3:
+            signal = 'SELL'
+            strength = min(int((abs(total_score) - 0.3) / 0.7 * 100), 95)
+            description = "Сильный медвежий консенсус индикаторов"
+        else:
+            signal = 'HOLD'
+            strength = 0
+            description = "Индикаторы не показывают четкого направления"
+
+        # Детализация факторов
+        strong_factors = []
+        for indicator, score in components.items():
+            if abs(score) > 0.7:
+                direction = "бычий" if score > 0 else "медвежий"
+                strong_factors.append(f"{indicator.upper()} ({direction})")
+
+        if strong_factors:
+            description += f". Ключевые факторы: {', '.join(strong_factors)}"
+
+        return {
+            'signal': signal,
+            'strength': strength,
+            'description': description
+        }
+
     def generate_signal(self, data: pd.DataFrame) -> Dict[str, Any]:
         """Генерация сигнала на основе множества индикаторов"""
         try:
             if len(data) < 50:
                 return {'signal': 'HOLD', 'strength': 0, 'description': 'Недостаточно данных'}
 
-            latest = data.iloc[-1]
-            previous = data.iloc[-2]
+            previous, latest = self._last_rows(data)
+            self._latest_features(latest)
 
-            # Веса индикаторов из конфигурации
-            weights = self.config.parameters
+            # Значения, которые читаются при любом исходе, - в локальные переменные один раз
+            rsi = latest['rsi']
+            macd, macd_signal = latest['macd'], latest['macd_signal']
+            prev_macd, prev_macd_signal = previous['macd'], previous['macd_signal']
+            close = latest['close']
+            stoch_k, stoch_d = latest['stoch_k'], latest['stoch_d']
+            trend_composite = latest['trend_composite']
 
-            # Оценка каждого компонента (от -1 до +1)
+            # Оценка каждого компонента (от -1 до +1). Досрочного выхода по части компонентов
+            # нет: даже при уже определенном направлении все оценки входят в силу сигнала
+            # и в список ключевых факторов описания
             components = {}
 
             # 1. RSI компонент
             rsi_score = 0
-            if latest['rsi'] < 30:
+            if rsi < 30:
                 rsi_score = 1.0  # Сильный бычий
-            elif latest['rsi'] > 70:
+            elif rsi > 70:
                 rsi_score = -1.0  # Сильный медвежий
-            elif 40 < latest['rsi'] < 60:
-                rsi_score = 0.5 if latest['rsi'] > 50 else -0.5  # Слабый сигнал
+            elif 40 < rsi < 60:
+                rsi_score = 0.5 if rsi > 50 else -0.5  # Слабый сигнал
             components['rsi'] = rsi_score
 
             # 2. MACD компонент
             macd_score = 0
-            if latest['macd'] > latest['macd_signal'] and previous['macd'] <= previous['macd_signal']:
+            if macd > macd_signal and prev_macd <= prev_macd_signal:
                 macd_score = 1.0  # Бычье пересечение
-            elif latest['macd'] < latest['macd_signal'] and previous['macd'] >= previous['macd_signal']:
+            elif macd < macd_signal and prev_macd >= prev_macd_signal:
                 macd_score = -1.0  # Медвежье пересечение
-            elif latest['macd'] > latest['macd_signal']:
+            elif macd > macd_signal:
                 macd_score = 0.5  # Бычий тренд
             else:
                 macd_score = -0.5  # Медвежий тренд
@@ -904,9 +1363,9 @@ class AdvancedMultiStrategy(TradingStrategy):
 
             # 3. Bollinger Bands компонент
             bb_score = 0
-            if latest['close'] < latest['bb_lower']:
+            if close < latest['bb_lower']:
                 bb_score = 1.0  # Сильный бычий (отскок ожидается)
-            elif latest['close'] > latest['bb_upper']:
+            elif close > latest['bb_upper']:
                 bb_score = -1.0  # Сильный медвежий (отскок ожидается)
             elif latest['bb_position'] < 0.3:
                 bb_score = 0.5  # Близко к нижней полосе
@@ -916,11 +1375,11 @@ class AdvancedMultiStrategy(TradingStrategy):
 
             # 4. Stochastic компонент
             stoch_score = 0
-            if latest['stoch_k'] < 20 and latest['stoch_d'] < 20:
+            if stoch_k < 20 and stoch_d < 20:
                 stoch_score = 1.0
-            elif latest['stoch_k'] > 80 and latest['stoch_d'] > 80:
+            elif stoch_k > 80 and stoch_d > 80:
                 stoch_score = -1.0
-            elif latest['stoch_k'] > latest['stoch_d']:
+            elif stoch_k > stoch_d:
                 stoch_score = 0.3
             else:
                 stoch_score = -0.3
@@ -928,9 +1387,9 @@ class AdvancedMultiStrategy(TradingStrategy):
 
             # 5. Трендовый компонент
             trend_score = 0
-            if latest['trend_composite'] >= 3:
+            if trend_composite >= 3:
                 trend_score = 1.0
-            elif latest['trend_composite'] <= 1:
+            elif trend_composite <= 1:
                 trend_score = -1.0
             elif latest['adx'] > 25:
                 trend_score = 0.5 if latest['psar_trend'] > 0 else -0.5
@@ -956,40 +1415,10 @@ class AdvancedMultiStrategy(TradingStrategy):
 
             # Расчет общего скора
             total_score = 0
-            for component, weight in weights.items():
-                if component.startswith('weight_') and component[7:] in components:
-                    indicator_name = component[7:]
-                    total_score += components[indicator_name] * weight
-
-            # Конвертация скора в сигнал
-            if total_score > 0.3:
-                signal = 'BUY'
-                strength = min(int((total_score - 0.3) / 0.7 * 100), 95)
-                description = "Сильный бычий консенсус индикаторов"
-            elif total_score < -0.3:
-                signal = 'SELL'
-                strength = min(int((abs(total_score) - 0.3) / 0.7 * 100), 95)
-                description = "Сильный медвежий консенсус индикаторов"
-            else:
-                signal = 'HOLD'
-                strength = 0
-                description = "Индикаторы не показывают четкого направления"
-
-            # Детализация факторов
-            strong_factors = []
-            for indicator, score in components.items():
-                if abs(score) > 0.7:
-                    direction = "бычий" if score > 0 else "медвежий"
-                    strong_factors.append(f"{indicator.upper()} ({direction})")
-
-            if strong_factors:
-                description += f". Ключевые факторы: {', '.join(strong_factors)}"
-
-            return {
-                'signal': signal,
-                'strength': strength,
-                'description': description
-            }
+            for name, weight in self._active_weights:
+                total_score += components[name] * weight
+
+            return self._signal_from_score(total_score, components)
 
         except Exception as e:
             self.logger.error(f"❌ Ошибка генерации сигнала Advanced: {e}")
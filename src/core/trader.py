@@ -1,18 +1,128 @@
 import MetaTrader5 as mt5
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from types import MappingProxyType
 from typing import Optional, Dict, Tuple, List
 from datetime import datetime
 
 logger = logging.getLogger('Trader')
 
+# Описания кодов возврата торговых операций MT5. Таблица собирается один раз при импорте;
+# коды, которых нет в установленной версии MetaTrader5, пропускаются
+_TRADE_ERRORS: Dict[int, str] = {
+    getattr(mt5, name): description
+    for name, description in (
+        ('TRADE_RETCODE_REQUOTE', "Требуется перекотировка"),
+        ('TRADE_RETCODE_REJECT', "Ордер отклонен"),
+        ('TRADE_RETCODE_CANCEL', "Ордер отменен"),
+        ('TRADE_RETCODE_PLACED', "Ордер размещен"),
+        ('TRADE_RETCODE_DONE', "Ордер выполнен"),
+        ('TRADE_RETCODE_DONE_PARTIAL', "Ордер выполнен частично"),
+        ('TRADE_RETCODE_ERROR', "Ошибка выполнения ордера"),
+        ('TRADE_RETCODE_TIMEOUT', "Таймаут запроса"),
+        ('TRADE_RETCODE_INVALID', "Неверный запрос"),
+        ('TRADE_RETCODE_INVALID_VOLUME', "Неверный объем"),
+        ('TRADE_RETCODE_INVALID_PRICE', "Неверная цена"),
+        ('TRADE_RETCODE_INVALID_STOPS', "Неверные стоп-уровни"),
+        ('TRADE_RETCODE_TRADE_DISABLED', "Торговля запрещена"),
+        ('TRADE_RETCODE_MARKET_CLOSED', "Рынок закрыт"),
+        ('TRADE_RETCODE_NO_MONEY', "Недостаточно средств"),
+        ('TRADE_RETCODE_PRICE_CHANGED', "Цена изменилась"),
+        ('TRADE_RETCODE_PRICE_OFF', "Нет котировок"),
+        ('TRADE_RETCODE_INVALID_EXPIRATION', "Неверная дата экспирации"),
+        ('TRADE_RETCODE_ORDER_CHANGED', "Ордер изменен"),
+        ('TRADE_RETCODE_TOO_MANY_REQUESTS', "Слишком много запросов"),
+        ('TRADE_RETCODE_NO_CHANGES', "Нет изменений"),
+        ('TRADE_RETCODE_SERVER_DISABLES_AT', "Автотрейдинг запрещен"),
+        ('TRADE_RETCODE_CLIENT_DISABLES_AT', "Автотрейдинг отключен клиентом"),
+        ('TRADE_RETCODE_LOCKED', "Ордер заблокирован"),
+        ('TRADE_RETCODE_FROZEN', "Ордер заморожен"),
+        ('TRADE_RETCODE_INVALID_FILL', "Неверный тип исполнения"),
+        ('TRADE_RETCODE_CONNECTION', "Нет соединения"),
+        ('TRADE_RETCODE_ONLY_REAL', "Только реальные счета"),
+        ('TRADE_RETCODE_LIMIT_ORDERS', "Достигнут лимит ордеров"),
+        ('TRADE_RETCODE_LIMIT_VOLUME', "Достигнут лимит объема"),
+        ('TRADE_RETCODE_INVALID_ORDER', "Неверный ордер"),
+        ('TRADE_RETCODE_POSITION_CLOSED', "Позиция уже закрыта"),
+    )
+    if hasattr(mt5, name)
+}
+
+# Поля TradePosition, из которых get_open_positions собирает словарь позиции
+_POSITION_FIELDS = attrgetter('ticket', 'symbol', 'type', 'volume', 'price_open', 'price_current',
+                              'sl', 'tp', 'profit', 'swap', 'time')
+
+# Неизменная часть запросов на рыночную сделку (открытие и закрытие позиции)
+_ORDER_TEMPLATE = MappingProxyType({
+    "action": mt5.TRADE_ACTION_DEAL,
+    "magic": 202400,
+    "type_time": mt5.ORDER_TIME_GTC,
+    "type_filling": mt5.ORDER_FILLING_FOK,
+})
+
 
 class Trader:
+    # Сколько секунд (time.monotonic) помнить symbol_info символа: параметры контракта
+    # (point, digits, шаг объема, стоп-уровень) внутри сессии практически не меняются
+    SYMBOL_INFO_TTL = 0.2
+
     def __init__(self, mt5_connection):
         self.mt5 = mt5_connection
         self.logger = logger
         self.max_retries = 3
         self.retry_delay = 1
+        # Символ -> (момент запроса, symbol_info)
+        self._symbol_info_cache: Dict[str, Tuple[float, object]] = {}
+        # Символ -> (symbol_info, из которого посчитаны параметры, (point, digits, мин. расстояние))
+        self._symbol_params_cache: Dict[str, Tuple[object, Tuple[float, int, float]]] = {}
+
+    def _get_symbol_info(self, symbol: str):
+        """
+        symbol_info символа с кэшированием на SYMBOL_INFO_TTL секунд
+
+        Одна отправка ордера обращается к параметрам символа несколько раз, и каждый
+        вызов mt5.symbol_info - запрос к терминалу. Неудачный ответ не кэшируется и
+        сбрасывает запомненное значение.
+        """
+        cached = self._symbol_info_cache.get(symbol)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.SYMBOL_INFO_TTL:
+            return cached[1]
+
+        symbol_info = mt5.symbol_info(symbol)
+        if symbol_info is None:
+            self._symbol_info_cache.pop(symbol, None)
+        else:
+            self._symbol_info_cache[symbol] = (now, symbol_info)
+        return symbol_info
+
+    @staticmethod
+    def _stop_params(symbol_info) -> Tuple[float, int, float]:
+        """Размер пункта, точность цены и минимальное расстояние стоп-уровней (не меньше 10 пунктов)"""
+        point = symbol_info.point
+        min_stop_level = symbol_info.trade_stops_level * point if symbol_info.trade_stops_level > 0 else 10 * point
+        return point, symbol_info.digits, max(min_stop_level, 10 * point)
+
+    def _symbol_params(self, symbol: str) -> Optional[Tuple[float, int, float]]:
+        """
+        _stop_params символа (или None, если информации о символе нет)
+
+        Параметры пересчитываются только при смене объекта symbol_info, то есть при
+        обновлении кэша _get_symbol_info, поэтому изменения стоп-уровня брокером подхватываются.
+        """
+        symbol_info = self._get_symbol_info(symbol)
+        if not symbol_info:
+            return None
+
+        cached = self._symbol_params_cache.get(symbol)
+        if cached is not None and cached[0] is symbol_info:
+            return cached[1]
+
+        params = self._stop_params(symbol_info)
+        self._symbol_params_cache[symbol] = (symbol_info, params)
+        return params
 
     def _retry_operation(self, operation, *args, **kwargs):
         """Повторяет операцию в случае ошибки"""
@@ -46,16 +156,12 @@ class Trader:
             Tuple[float, float]: (стоп-лосс, тейк-профит)
         """
         try:
-            symbol_info = mt5.symbol_info(symbol)
-            if not symbol_info:
+            params = self._symbol_params(symbol)
+            if params is None:
                 return 0.0, 0.0
 
-            point = symbol_info.point
-            digits = symbol_info.digits
-
-            # Минимальные расстояния
-            min_stop_level = symbol_info.trade_stops_level * point if symbol_info.trade_stops_level > 0 else 10 * point
-            min_stop_distance = max(min_stop_level, 10 * point)  # Минимум 10 пунктов
+            # Размер пункта, точность цены и минимальное расстояние стопов
+            point, digits, min_stop_distance = params
 
             # Рассчитываем уровни в пунктах
             if order_type.lower() == 'buy':
@@ -106,7 +212,8 @@ class Trader:
             if take_profit > 0:
                 take_profit = round(take_profit, digits)
 
-            self.logger.debug(f"🎯 Уровни для {symbol}: Цена={price:.5f}, SL={stop_loss:.5f}, TP={take_profit:.5f}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"🎯 Уровни для {symbol}: Цена={price:.5f}, SL={stop_loss:.5f}, TP={take_profit:.5f}")
 
             return stop_loss, take_profit
 
@@ -117,7 +224,7 @@ class Trader:
     def check_market_conditions(self, symbol: str) -> Tuple[bool, str]:
         """Проверяет условия рынка для торговли"""
         try:
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self._get_symbol_info(symbol)
             if not symbol_info:
                 return False, f"Символ {symbol} не найден"
 
@@ -153,7 +260,7 @@ class Trader:
                 self.logger.error("Не удалось получить информацию об аккаунте")
                 return None
 
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self._get_symbol_info(symbol)
             if not symbol_info:
                 self.logger.error(f"Не удалось получить информацию о символе {symbol}")
                 return None
@@ -200,7 +307,8 @@ class Trader:
 
     def send_order(self, symbol: str, order_type: str, volume: float,
                    stop_loss_pips: float = 0.0, take_profit_pips: float = 0.0,
-                   deviation: int = 20, comment: str = "AI Trader") -> Tuple[bool, str]:
+                   deviation: int = 20, comment: str = "AI Trader",
+                   return_ticket: bool = False) -> Tuple:
         """
         Отправляет ордер на рынок (версия с пунктами)
 
@@ -212,12 +320,18 @@ class Trader:
             take_profit_pips: уровень тейк-профита в пунктах
             deviation: максимальное отклонение цены
             comment: комментарий к ордеру
+            return_ticket: вернуть также ticket исполненного ордера
 
         Returns:
             Tuple[bool, str]: (Успешность, Сообщение)
+            Tuple[bool, str, Optional[int]]: (Успешность, Сообщение, Ticket) при return_ticket=True
         """
-        return self._retry_operation(self._send_order_impl, symbol, order_type, volume,
-                                     stop_loss_pips, take_profit_pips, deviation, comment)
+        result = self._retry_operation(self._send_order_impl, symbol, order_type, volume,
+                                       stop_loss_pips, take_profit_pips, deviation, comment)
+        if return_ticket:
+            ticket = result[2] if len(result) > 2 else None
+            return result[0], result[1], ticket
+        return result[0], result[1]
 
     def _send_order_impl(self, symbol: str, order_type: str, volume: float,
                          stop_loss_pips: float = 0.0, take_profit_pips: float = 0.0,
@@ -238,7 +352,7 @@ class Trader:
                 return False, f"Не удалось получить цену для {symbol}"
 
             # Определяем параметры ордера
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self._get_symbol_info(symbol)
             if not symbol_info:
                 return False, f"Не удалось получить информацию о символе {symbol}"
 
@@ -265,7 +379,7 @@ class Trader:
 
             # Подготавливаем запрос
             request = {
-                "action": mt5.TRADE_ACTION_DEAL,
+                **_ORDER_TEMPLATE,
                 "symbol": symbol,
                 "volume": volume,
                 "type": order_type_mt5,
@@ -273,10 +387,7 @@ class Trader:
                 "sl": stop_loss,
                 "tp": take_profit,
                 "deviation": deviation,
-                "magic": 202400,
                 "comment": comment,
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_FOK,
             }
 
             # Отправляем ордер
@@ -294,7 +405,7 @@ class Trader:
                 success_msg += f", TP: {take_profit:.5f} ({take_profit_pips} п.)"
 
             self.logger.info(success_msg)
-            return True, success_msg
+            return True, success_msg, result.order
 
         except Exception as e:
             error_msg = f"Исключение при отправке ордера: {str(e)}"
@@ -341,7 +452,7 @@ class Trader:
                 return False, f"Не удалось получить цену для {symbol}"
 
             # Определяем параметры ордера
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self._get_symbol_info(symbol)
             if not symbol_info:
                 return False, f"Не удалось получить информацию о символе {symbol}"
 
@@ -369,7 +480,7 @@ class Trader:
 
             # Подготавливаем запрос
             request = {
-                "action": mt5.TRADE_ACTION_DEAL,
+                **_ORDER_TEMPLATE,
                 "symbol": symbol,
                 "volume": volume,
                 "type": order_type_mt5,
@@ -377,10 +488,7 @@ class Trader:
                 "sl": stop_loss,
                 "tp": take_profit,
                 "deviation": deviation,
-                "magic": 202400,
                 "comment": comment,
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_FOK,
             }
 
             # Отправляем ордер
@@ -409,9 +517,7 @@ class Trader:
                                is_tp: bool = False) -> Optional[str]:
         """Проверяет минимальное расстояние для стоп-уровней"""
         try:
-            point = symbol_info.point
-            min_stop_level = symbol_info.trade_stops_level * point if symbol_info.trade_stops_level > 0 else 10 * point
-            min_stop_distance = max(min_stop_level, 10 * point)
+            point, _, min_stop_distance = self._stop_params(symbol_info)
 
             level_type = "тейк-профит" if is_tp else "стоп-лосс"
 
@@ -437,70 +543,38 @@ class Trader:
 
     def _get_trade_error_description(self, error_code: int) -> str:
         """Возвращает описание торговой ошибки MT5"""
-        error_descriptions = {
-            mt5.TRADE_RETCODE_REQUOTE: "Требуется перекотировка",
-            mt5.TRADE_RETCODE_REJECT: "Ордер отклонен",
-            mt5.TRADE_RETCODE_CANCEL: "Ордер отменен",
-            mt5.TRADE_RETCODE_PLACED: "Ордер размещен",
-            mt5.TRADE_RETCODE_DONE: "Ордер выполнен",
-            mt5.TRADE_RETCODE_DONE_PARTIAL: "Ордер выполнен частично",
-            mt5.TRADE_RETCODE_ERROR: "Ошибка выполнения ордера",
-            mt5.TRADE_RETCODE_TIMEOUT: "Таймаут запроса",
-            mt5.TRADE_RETCODE_INVALID: "Неверный запрос",
-            mt5.TRADE_RETCODE_INVALID_VOLUME: "Неверный объем",
-            mt5.TRADE_RETCODE_INVALID_PRICE: "Неверная цена",
-            mt5.TRADE_RETCODE_INVALID_STOPS: "Неверные стоп-уровни",
-            mt5.TRADE_RETCODE_TRADE_DISABLED: "Торговля запрещена",
-            mt5.TRADE_RETCODE_MARKET_CLOSED: "Рынок закрыт",
-            mt5.TRADE_RETCODE_NO_MONEY: "Недостаточно средств",
-            mt5.TRADE_RETCODE_PRICE_CHANGED: "Цена изменилась",
-            mt5.TRADE_RETCODE_PRICE_OFF: "Нет котировок",
-            mt5.TRADE_RETCODE_INVALID_EXPIRATION: "Неверная дата экспирации",
-            mt5.TRADE_RETCODE_ORDER_CHANGED: "Ордер изменен",
-            mt5.TRADE_RETCODE_TOO_MANY_REQUESTS: "Слишком много запросов",
-            mt5.TRADE_RETCODE_NO_CHANGES: "Нет изменений",
-            mt5.TRADE_RETCODE_SERVER_DISABLES_AT: "Автотрейдинг запрещен",
-            mt5.TRADE_RETCODE_CLIENT_DISABLES_AT: "Автотрейдинг отключен клиентом",
-            mt5.TRADE_RETCODE_LOCKED: "Ордер заблокирован",
-            mt5.TRADE_RETCODE_FROZEN: "Ордер заморожен",
-            mt5.TRADE_RETCODE_INVALID_FILL: "Неверный тип исполнения",
-            mt5.TRADE_RETCODE_CONNECTION: "Нет соединения",
-            mt5.TRADE_RETCODE_ONLY_REAL: "Только реальные счета",
-            mt5.TRADE_RETCODE_LIMIT_ORDERS: "Достигнут лимит ордеров",
-            mt5.TRADE_RETCODE_LIMIT_VOLUME: "Достигнут лимит объема",
-            mt5.TRADE_RETCODE_INVALID_ORDER: "Неверный ордер",
-            mt5.TRADE_RETCODE_POSITION_CLOSED: "Позиция уже закрыта",
-        }
-
-        return error_descriptions.get(error_code, f"Неизвестная ошибка: {error_code}")
+        return _TRADE_ERRORS.get(error_code, f"Неизвестная ошибка: {error_code}")
 
     def get_open_positions(self, symbol: str = "") -> List[Dict]:
         """Получает список открытых позиций с улучшенной обработкой ошибки"""
         try:
             positions = mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()
-            if positions is None:
-                return []
-
             if not positions:
                 return []
 
+            # Поля позиции читаются одним вызовом attrgetter, константы - из локальных имен
+            read_fields = _POSITION_FIELDS
+            buy_type = mt5.ORDER_TYPE_BUY
+            from_timestamp = datetime.fromtimestamp
+
             result = []
             for position in positions:
                 try:
-                    pos_data = {
-                        'ticket': position.ticket,
-                        'symbol': position.symbol,
-                        'type': 'BUY' if position.type == mt5.ORDER_TYPE_BUY else 'SELL',
-                        'volume': position.volume,
-                        'open_price': position.price_open,
-                        'current_price': position.price_current,
-                        'sl': position.sl,
-                        'tp': position.tp,
-                        'profit': position.profit,
-                        'swap': position.swap,
-                        'time': datetime.fromtimestamp(position.time)
-                    }
-                    result.append(pos_data)
+                    (ticket, position_symbol, position_type, volume, price_open, price_current,
+                     sl, tp, profit, swap, open_time) = read_fields(position)
+                    result.append({
+                        'ticket': ticket,
+                        'symbol': position_symbol,
+                        'type': 'BUY' if position_type == buy_type else 'SELL',
+                        'volume': volume,
+                        'open_price': price_open,
+                        'current_price': price_current,
+                        'sl': sl,
+                        'tp': tp,
+                        'profit': profit,
+                        'swap': swap,
+                        'time': from_timestamp(open_time)
+                    })
                 except AttributeError as e:
                     self.logger.warning(f"⚠️ Ошибка получения атрибута позиции: {e}")
                     continue
@@ -539,17 +613,14 @@ class Trader:
                 price = mt5.symbol_info_tick(symbol).ask
 
             request = {
-                "action": mt5.TRADE_ACTION_DEAL,
+                **_ORDER_TEMPLATE,
                 "position": ticket,
                 "symbol": symbol,
                 "volume": volume,
                 "type": close_type,
                 "price": price,
                 "deviation": deviation,
-                "magic": 202400,
                 "comment": "Closed by AI Trader",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_FOK,
             }
 
             result = mt5.order_send(request)
@@ -565,19 +636,29 @@ class Trader:
             self.logger.error(error_msg)
             return False, error_msg
 
-    def close_all_positions(self, symbol: str = "") -> Tuple[bool, str]:
-        """Закрывает все открытые позиции"""
+    def close_all_positions(self, symbol: str = "", max_workers: int = 4) -> Tuple[bool, str]:
+        """
+        Закрывает все открытые позиции
+
+        Запросы на закрытие отправляются параллельно в пуле потоков: order_send блокирует
+        поток до ответа терминала и отпускает GIL, поэтому ожидания перекрываются.
+        Повторы при неудаче выполняет close_position. Если пул запустить не удалось,
+        позиции закрываются по очереди.
+        """
         try:
             positions = self.get_open_positions(symbol)
             if not positions:
                 return True, "Нет открытых позиций для закрытия"
 
-            results = []
-            for position in positions:
-                success, message = self.close_position(position['ticket'])
-                results.append(f"Position {position['ticket']}: {message}")
-                time.sleep(0.1)  # Небольшая задержка между запросами
+            tickets = [position['ticket'] for position in positions]
+            try:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(tickets))) as executor:
+                    outcomes = list(executor.map(self.close_position, tickets))
+            except RuntimeError as e:
+                self.logger.warning(f"⚠️ Параллельное закрытие недоступно, закрываем по очереди: {e}")
+                outcomes = [self.close_position(ticket) for ticket in tickets]
 
+            results = [f"Position {ticket}: {message}" for ticket, (success, message) in zip(tickets, outcomes)]
             return True, " | ".join(results)
 
         except Exception as e:
@@ -585,21 +666,42 @@ class Trader:
             self.logger.error(error_msg)
             return False, error_msg
 
+    def _position_aggregates(self, symbol: str = "") -> Tuple[int, float, float, Dict[str, float]]:
+        """
+        Итоги по открытым позициям прямо по ответу positions_get, без словарей get_open_positions
+
+        Returns:
+            (число позиций, прибыль со свопом, суммарный объем, символ -> объем последней позиции)
+        """
+        try:
+            positions = (mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()) or ()
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка получения позиций: {str(e)}")
+            positions = ()
+
+        total_profit = 0
+        total_volume = 0
+        positions_by_symbol = {}
+        for position in positions:
+            volume = position.volume
+            total_profit += position.profit + position.swap
+            total_volume += volume
+            positions_by_symbol[position.symbol] = volume
+
+        return len(positions), total_profit, total_volume, positions_by_symbol
+
     def get_account_summary(self) -> Dict:
         """Получает сводку по аккаунту"""
         try:
             account_info = self.mt5.get_account_info()
-            positions = self.get_open_positions()
-
-            total_profit = sum(pos['profit'] + pos['swap'] for pos in positions)
-            total_volume = sum(pos['volume'] for pos in positions)
+            open_positions, total_profit, total_volume, positions_by_symbol = self._position_aggregates()
 
             return {
                 'account_info': account_info,
-                'open_positions': len(positions),
+                'open_positions': open_positions,
                 'total_profit': total_profit,
                 'total_volume': total_volume,
-                'positions_by_symbol': {pos['symbol']: pos['volume'] for pos in positions}
+                'positions_by_symbol': positions_by_symbol
             }
         except Exception as e:
             self.logger.error(f"Ошибка получения сводки: {str(e)}")